@@ -0,0 +1,188 @@
+# benchmarks/bench_sampling.py
+"""Sampling benchmarks over tessellation type, dimension, intensity and directions.
+
+Every case samples with a fixed seed and records the best wall time over
+``--repeat`` runs, the peak memory traced during one extra run, the number
+of cells and the time per cell. Results can be saved as a baseline and
+later runs compared against it; a case that got slower (or used more
+memory) by more than ``--threshold`` fails the run.
+
+    python benchmarks/bench_sampling.py                       # run and print
+    python benchmarks/bench_sampling.py --save-baseline       # record benchmarks/baseline.json
+    python benchmarks/bench_sampling.py --compare             # fail on regressions
+
+Peak memory is measured with ``tracemalloc``, so it covers Python and NumPy
+allocations but not memory allocated inside GEOS or VTK.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tessellations.ensemble import TESSELLATIONS  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+SEED = 12345
+
+# Sampling parameter (lam or stop_time) sweeps per type and dimension
+PARAMETERS = {
+    ("poisson", 2): [50, 200, 800],
+    ("poisson", 3): [10, 25, 50],
+    ("stit", 2): [20, 50, 100],
+    ("stit", 3): [5, 10, 15],
+    ("mondrian", 2): [50, 200, 800],
+    ("mondrian", 3): [10, 25, 50],
+}
+
+DIRECTION_FILES = {2: "directions_2d.csv", 3: "directions_3d.csv"}
+
+
+def cases(quick=False):
+    """Yield ``(kind, dim, param, directions)`` for every benchmark case."""
+    for (kind, dim), params in PARAMETERS.items():
+        # Mondrian splits are axis-aligned and ignore directions
+        directions = ["isotropic"] if kind == "mondrian" else ["isotropic", "matrix"]
+        for param in params[:1] if quick else params:
+            for d in directions:
+                yield kind, dim, param, d
+
+
+def case_key(kind, dim, param, directions):
+    return f"{kind}/{dim}d/{param:g}/{directions}"
+
+
+def _make(kind, dim, directions):
+    matrix = None
+    if directions == "matrix":
+        matrix = np.loadtxt(os.path.join(ROOT, DIRECTION_FILES[dim]), delimiter=",")
+        # Pre-normalize the weights so the constructor does not print a note
+        matrix = matrix / np.linalg.norm(matrix, axis=1).sum()
+    return TESSELLATIONS[kind](dim, direction_matrix=matrix, rng=SEED)
+
+
+def _n_cells(tess):
+    return len(tess.cell_bounds) if hasattr(tess, "cell_bounds") else len(tess.cells)
+
+
+def run_case(kind, dim, param, directions, repeat=5):
+    """Benchmark one case; returns a dict of its measurements."""
+    _make(kind, dim, directions).sample(param)  # warm-up, not timed
+    best = np.inf
+    for _ in range(repeat):
+        tess = _make(kind, dim, directions)
+        # Like timeit, keep the garbage collector out of the timings
+        gc.collect()
+        gc.disable()
+        try:
+            t0 = time.perf_counter()
+            tess.sample(param)
+            best = min(best, time.perf_counter() - t0)
+        finally:
+            gc.enable()
+    n_cells = _n_cells(tess)
+
+    tess = _make(kind, dim, directions)
+    tracemalloc.start()
+    tess.sample(param)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "kind": kind, "dim": dim, "param": param, "directions": directions,
+        "seconds": best,
+        "peak_mb": peak / 2 ** 20,
+        "n_cells": n_cells,
+        "us_per_cell": 1e6 * best / max(n_cells, 1),
+    }
+
+
+def scaling_exponents(results):
+    """Log-log slope of time against cell count for every (type, dim, directions) sweep."""
+    groups = {}
+    for r in results:
+        groups.setdefault((r["kind"], r["dim"], r["directions"]), []).append(r)
+    slopes = {}
+    for key, rows in groups.items():
+        cells = np.array([r["n_cells"] for r in rows], dtype=float)
+        seconds = np.array([r["seconds"] for r in rows])
+        if len(rows) >= 2 and np.ptp(np.log(cells)) > 0:
+            slopes[key] = float(np.polyfit(np.log(cells), np.log(seconds), 1)[0])
+    return slopes
+
+
+def compare(results, baseline, threshold, min_seconds=0.02):
+    """Return a list of regression messages against ``baseline`` (a key -> result mapping).
+
+    Slowdowns smaller than ``min_seconds`` are ignored as timer noise.
+    """
+    problems = []
+    for r in results:
+        key = case_key(r["kind"], r["dim"], r["param"], r["directions"])
+        base = baseline.get(key)
+        if base is None:
+            continue
+        if r["seconds"] > threshold * base["seconds"] and r["seconds"] - base["seconds"] > min_seconds:
+            problems.append(f"{key}: time {r['seconds']:.4f}s vs baseline {base['seconds']:.4f}s")
+        if r["peak_mb"] > threshold * base["peak_mb"] and r["peak_mb"] - base["peak_mb"] > 1.0:
+            problems.append(f"{key}: peak memory {r['peak_mb']:.1f} MB vs baseline {base['peak_mb']:.1f} MB")
+        if r["n_cells"] != base["n_cells"]:
+            # Same seed, different output: the sampler's behaviour changed
+            print(f"note: {key}: {r['n_cells']} cells vs {base['n_cells']} in the baseline")
+    return problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark tessellation sampling.")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case (the best is kept).")
+    parser.add_argument("--quick", action="store_true", help="Only the smallest parameter of each sweep.")
+    parser.add_argument("--only", type=str, default=None,
+                        help="Only run cases whose key (e.g. 'stit/3d') contains this string.")
+    parser.add_argument("--baseline", type=str, default=DEFAULT_BASELINE, help="Baseline JSON file.")
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline.")
+    parser.add_argument("--compare", action="store_true", help="Fail if any case regressed against the baseline.")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="Allowed slowdown / memory growth factor before a case counts as a regression.")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'case':<28} {'time [s]':>10} {'peak [MB]':>10} {'cells':>8} {'us/cell':>10}")
+    for kind, dim, param, directions in cases(args.quick):
+        key = case_key(kind, dim, param, directions)
+        if args.only is not None and args.only not in key:
+            continue
+        r = run_case(kind, dim, param, directions, repeat=args.repeat)
+        results.append(r)
+        print(f"{key:<28} {r['seconds']:>10.4f} {r['peak_mb']:>10.2f} {r['n_cells']:>8d} {r['us_per_cell']:>10.2f}")
+
+    print("\nScaling (time ~ cells^k):")
+    for (kind, dim, directions), k in scaling_exponents(results).items():
+        print(f"  {kind}/{dim}d/{directions}: k = {k:.2f}")
+
+    if args.save_baseline:
+        baseline = {case_key(r["kind"], r["dim"], r["param"], r["directions"]): r for r in results}
+        with open(args.baseline, "w") as f:
+            json.dump({"seed": SEED, "results": baseline}, f, indent=2)
+        print(f"\nWrote baseline to {args.baseline}")
+
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        problems = compare(results, baseline, args.threshold)
+        if problems:
+            print(f"\n{len(problems)} regression(s) beyond {args.threshold:g}x:")
+            for p in problems:
+                print(f"  {p}")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:g}x against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
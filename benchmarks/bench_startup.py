@@ -0,0 +1,68 @@
+# benchmarks/bench_startup.py
+"""Startup-time benchmark for ``import tessellations``.
+
+Imports the sampling, statistics and storage modules in fresh interpreters
+and reports the import time. Fails (exit code 1) if a rendering backend is
+imported eagerly or the median import time exceeds ``--max-ms``.
+
+    python benchmarks/bench_startup.py --repeat 20 --max-ms 400
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must only load when something is rendered
+HEAVY_MODULES = ("pyvista", "vtk", "vtkmodules", "matplotlib")
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import tessellations, tessellations.ensemble, tessellations.stats, tessellations.storage
+elapsed = time.perf_counter() - t0
+heavy = sorted({{name.split('.')[0] for name in sys.modules}} & set({heavy!r}))
+print(json.dumps({{"seconds": elapsed, "heavy": heavy}}))
+"""
+
+
+def measure(repeat):
+    """Import time in seconds of each of ``repeat`` fresh interpreters, and any heavy modules they loaded."""
+    probe = _PROBE.format(heavy=HEAVY_MODULES)
+    times, heavy = [], set()
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, check=True,
+                             capture_output=True, text=True).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        times.append(result["seconds"])
+        heavy.update(result["heavy"])
+    return times, sorted(heavy)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the import time of the sampling core.")
+    parser.add_argument("--repeat", type=int, default=10, help="Number of fresh interpreters to time.")
+    parser.add_argument("--max-ms", type=float, default=500.0,
+                        help="Fail if the median import time exceeds this many milliseconds.")
+    args = parser.parse_args(argv)
+
+    times, heavy = measure(args.repeat)
+    median_ms = 1000.0 * statistics.median(times)
+    print(f"import tessellations: median {median_ms:.1f} ms, min {1000.0 * min(times):.1f} ms "
+          f"over {args.repeat} runs")
+
+    failed = False
+    if heavy:
+        print(f"FAIL: rendering backends imported at startup: {', '.join(heavy)}")
+        failed = True
+    if median_ms > args.max_ms:
+        print(f"FAIL: median import time {median_ms:.1f} ms exceeds {args.max_ms:.1f} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,25 @@
 # run_tessellation.py
 import argparse
 import os
+import sys
 import numpy as np
 from tessellations import PoissonTessellation, STITTessellation, MondrianTessellation
+from tessellations.cache import SampleCache
+from tessellations.ensemble import run_ensemble
+from tessellations.storage import save
 
-def main():
-    """Main function to run the tessellation sampler from the command line."""
-    parser = argparse.ArgumentParser(description="Generate and visualize 2D/3D tessellations.")
-    
-    parser.add_argument("type", type=str, choices=['poisson', 'stit', 'mondrian'], 
+def _add_common_arguments(parser):
+    """Arguments shared by the sampling and ensemble commands."""
+    parser.add_argument("type", type=str, choices=['poisson', 'stit', 'mondrian'],
                         help="The type of tessellation to generate.")
-    
-    parser.add_argument("dim", type=str, choices=['2d', '3d'], 
+
+    parser.add_argument("dim", type=str, choices=['2d', '3d'],
                         help="The dimension of the tessellation.")
-    
-    parser.add_argument("--lam", type=float, 
+
+    parser.add_argument("--lam", type=float,
                         default=10,
                         help="Intensity for poisson tessellation.")
-    parser.add_argument("--stop_time", type=float, 
+    parser.add_argument("--stop_time", type=float,
                         default=20,
                         help="Stop time for STIT tessellation.")
 
@@ -32,65 +34,223 @@ def main():
         ),
     )
 
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Seed for the random number generator.")
+
+    parser.add_argument(
+        "--bounds",
+        type=float,
+        nargs="+",
+        default=None,
+        help=(
+            "Sampling window: 'minx miny maxx maxy' in 2D or 'xmin xmax ymin ymax zmin zmax' in 3D "
+            "(default: the unit square / cube)."
+        ),
+    )
+
+def _load_direction_matrix(path, dim_flag):
+    """Load and validate an optional directional distribution matrix."""
+    if path is None:
+        return None
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Directional matrix file not found: {path}")
+    try:
+        if path.lower().endswith((".npy", ".npz")):
+            # Memory-map .npy files so large direction sets are not copied
+            loaded = np.load(path, mmap_mode="r")
+            if isinstance(loaded, np.lib.npyio.NpzFile):
+                # Heuristic: take the first array
+                first_key = list(loaded.keys())[0]
+                direction_matrix = loaded[first_key]
+            else:
+                direction_matrix = loaded
+        else:
+            # CSV or text
+            direction_matrix = np.loadtxt(path, delimiter=",")
+    except Exception as e:
+        raise ValueError(f"Failed to load direction matrix from {path}: {e}")
+
+    # Validate dimensionality
+    if direction_matrix.ndim != 2:
+        raise ValueError("Direction matrix must be 2D (rows = directions, cols = dimensions).")
+    expected_cols = 2 if dim_flag == '2d' else 3
+    if direction_matrix.shape[1] != expected_cols:
+        raise ValueError(
+            f"Direction matrix shape mismatch: expected {expected_cols} columns for {dim_flag}, "
+            f"got {direction_matrix.shape[1]}"
+        )
+    return direction_matrix
+
+def _parameter(args):
+    """Name and value of the sampling parameter for the chosen type."""
+    if args.type == 'poisson':
+        return 'lam', args.lam
+    return 'stop_time', args.stop_time
+
+def ensemble_main(argv):
+    """Run many independent realizations and report summary statistics."""
+    parser = argparse.ArgumentParser(
+        prog="main.py ensemble",
+        description="Sample an ensemble of independent tessellations in parallel.",
+    )
+    _add_common_arguments(parser)
+    parser.add_argument("--n", type=int, default=100,
+                        help="Number of independent realizations.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Number of worker processes.")
+    parser.add_argument("--out", type=str, default=None,
+                        help="Optional .npz file for the per-replicate results.")
+    args = parser.parse_args(argv)
+
+    dim = 2 if args.dim == '2d' else 3
+    direction_matrix = _load_direction_matrix(args.dir_matrix, args.dim)
+    param_name, param_val = _parameter(args)
+
+    seed = np.random.SeedSequence(args.seed)
+    print(f"Sampling {args.n} {args.dim} {args.type} tessellations with {param_name}={param_val} "
+          f"on {args.workers} worker(s), seed={seed.entropy}...")
+    results = run_ensemble(args.type, dim, param_val, args.n, seed=seed, workers=args.workers,
+                           direction_matrix=direction_matrix, bounds=args.bounds)
+
+    n_cells = np.array([r["n_cells"] for r in results])
+    measures = np.concatenate([r["cell_measures"] for r in results])
+    print(f"Cells per realization: mean={n_cells.mean():.4f}, var={n_cells.var(ddof=1) if args.n > 1 else 0.0:.4f}")
+    print(f"Cell {'area' if dim == 2 else 'volume'}: mean={measures.mean():.6g}, var={measures.var():.6g}")
+
+    if args.out is not None:
+        np.savez(
+            args.out,
+            n_cells=n_cells,
+            n_hyperplanes=np.array([r["n_hyperplanes"] for r in results]),
+            cell_measures=measures,
+            cell_offsets=np.concatenate([[0], np.cumsum(n_cells)]),
+            seed=str(seed.entropy),
+        )
+        print(f"Wrote {args.out}")
+
+def main(argv=None):
+    """Main function to run the tessellation sampler from the command line."""
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] == 'ensemble':
+        return ensemble_main(argv[1:])
+
+    parser = argparse.ArgumentParser(description="Generate and visualize 2D/3D tessellations.",
+                                     epilog="Use 'main.py ensemble ...' to sample many realizations in parallel.")
+    _add_common_arguments(parser)
+
     parser.add_argument(
         "--animate",
         action="store_true",
         help="Animate by plotting generated hyperplanes one by one.",
     )
 
-    args = parser.parse_args()
+    parser.add_argument(
+        "--save",
+        type=str,
+        default=None,
+        help="Save the sampled tessellation to a .npz file or a directory of .npy files.",
+    )
+
+    parser.add_argument(
+        "--output",
+        type=str,
+        default=None,
+        help="Render off screen to this image file (e.g. out.png) instead of opening a window.",
+    )
+
+    parser.add_argument(
+        "--animate-out",
+        type=str,
+        default=None,
+        help="Write the animation to a GIF or video file (e.g. out.gif, out.mp4) instead of playing it.",
+    )
+
+    parser.add_argument(
+        "--fps",
+        type=float,
+        default=2,
+        help="Frames (hyperplanes) per second for animations.",
+    )
+
+    parser.add_argument(
+        "--tiles",
+        type=int,
+        default=None,
+        help="Poisson only: build the cells tile by tile on a grid of this many tiles per axis.",
+    )
+
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Poisson only: number of worker processes for --tiles.",
+    )
+
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print per-phase timings and counters of the sampling run.",
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        type=str,
+        default=None,
+        help="Reuse seeded samples stored in this directory, adding new ones (least recently used evicted).",
+    )
+
+    parser.add_argument(
+        "--cache-size",
+        type=float,
+        default=1024,
+        help="Size cap of --cache-dir in MB.",
+    )
+
+    args = parser.parse_args(argv)
 
     dim = 2 if args.dim == '2d' else 3
-    
+
     # Load optional directional distribution matrix
-    direction_matrix = None
-    if args.dir_matrix is not None:
-        if not os.path.exists(args.dir_matrix):
-            raise FileNotFoundError(f"Directional matrix file not found: {args.dir_matrix}")
-        try:
-            if args.dir_matrix.lower().endswith((".npy", ".npz")):
-                loaded = np.load(args.dir_matrix)
-                if isinstance(loaded, np.lib.npyio.NpzFile):
-                    # Heuristic: take the first array
-                    first_key = list(loaded.keys())[0]
-                    direction_matrix = loaded[first_key]
-                else:
-                    direction_matrix = loaded
-            else:
-                # CSV or text
-                direction_matrix = np.loadtxt(args.dir_matrix, delimiter=",")
-        except Exception as e:
-            raise ValueError(f"Failed to load direction matrix from {args.dir_matrix}: {e}")
-
-        # Validate dimensionality
-        if direction_matrix.ndim != 2:
-            raise ValueError("Direction matrix must be 2D (rows = directions, cols = dimensions).")
-        expected_cols = 2 if args.dim == '2d' else 3
-        if direction_matrix.shape[1] != expected_cols:
-            raise ValueError(
-                f"Direction matrix shape mismatch: expected {expected_cols} columns for {args.dim}, "
-                f"got {direction_matrix.shape[1]}"
-            )
+    direction_matrix = _load_direction_matrix(args.dir_matrix, args.dim)
 
     # Select and instantiate the correct class
     if args.type == 'poisson':
-        tess = PoissonTessellation(dim, direction_matrix=direction_matrix)
-        param_name = 'lam'
-        param_val = args.lam
+        tess = PoissonTessellation(dim, direction_matrix=direction_matrix, rng=args.seed, bounds=args.bounds)
     elif args.type == 'stit':
-        tess = STITTessellation(dim, direction_matrix=direction_matrix)
-        param_name = 'stop_time'
-        param_val = args.stop_time
+        tess = STITTessellation(dim, direction_matrix=direction_matrix, rng=args.seed, bounds=args.bounds)
     else:
-        tess = MondrianTessellation(dim)
-        param_name = 'stop_time'
-        param_val = args.stop_time
+        tess = MondrianTessellation(dim, rng=args.seed, bounds=args.bounds)
+    if args.type != 'poisson' and (args.tiles is not None or args.workers != 1):
+        parser.error("--tiles and --workers are only supported for poisson tessellations.")
+    param_name, param_val = _parameter(args)
 
     print(f"Generating {args.dim} {args.type} tessellation with {param_name}={param_val}...")
-    
+
     # Sample and visualize
-    tess.sample(param_val)
-    tess.visualize(animate=args.animate)
+    if args.profile:
+        tess.enable_profiling()
+    kwargs = {'tiles': args.tiles, 'workers': args.workers} if args.type == 'poisson' else {}
+    if args.cache_dir is not None:
+        cache = SampleCache(args.cache_dir, max_bytes=args.cache_size * 2**20)
+        tess = cache.sample(tess, param_val, **kwargs)
+        if cache.hits:
+            print(f"Loaded from cache {args.cache_dir}")
+            if args.profile:
+                print("No profile: the tessellation was loaded from the cache rather than sampled.")
+    else:
+        tess.sample(param_val, **kwargs)
+    if args.profile and tess.profile is not None:
+        print(tess.profile.format())
+    if args.save is not None:
+        save(tess, args.save)
+        print(f"Saved tessellation to {args.save}")
+    if args.animate_out is not None:
+        tess.visualize(animate=True, filename=args.animate_out, fps=args.fps)
+        print(f"Wrote {args.animate_out}")
+    else:
+        tess.visualize(animate=args.animate, filename=None if args.animate else args.output, fps=args.fps)
+        if args.output is not None and not args.animate:
+            print(f"Wrote {args.output}")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
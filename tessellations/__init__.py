@@ -1,4 +1,4 @@
 # tessellations/__init__.py
 from .poisson import PoissonTessellation
 from .stit import STITTessellation
-from .mondrian import MondrianTessellation
\ No newline at end of file
+from .mondrian import MondrianTessellation, LazyMondrian
\ No newline at end of file
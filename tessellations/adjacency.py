@@ -0,0 +1,109 @@
+# tessellations/adjacency.py
+"""Cell adjacency graphs recorded while sampling.
+
+Every sampler that tracks adjacency sets ``tess.adjacency`` to an
+``Adjacency``: a symmetric graph in CSR layout whose edges join cells that
+share a facet of positive length (2D) or area (3D), weighted by that
+measure. Cells that only touch at a point or along an edge are not
+neighbours.
+
+    tess = STITTessellation(2, rng=0).enable_adjacency().sample(20)
+    adj = tess.adjacency
+    adj.neighbours(0), adj.degrees.mean()
+"""
+import numpy as np
+
+
+class Adjacency:
+    """Symmetric cell adjacency graph in CSR layout.
+
+    The neighbours of cell ``i`` are ``indices[indptr[i]:indptr[i + 1]]``
+    (sorted) and ``measure`` holds the length or area of the facet shared
+    with each of them.
+    """
+
+    def __init__(self, indptr, indices, measure):
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.measure = np.asarray(measure, dtype=float)
+
+    @classmethod
+    def from_pairs(cls, n_cells, a, b, measure):
+        """Build the graph from undirected edges ``(a[k], b[k])`` with facet measures."""
+        a = np.asarray(a, dtype=np.int64)
+        b = np.asarray(b, dtype=np.int64)
+        measure = np.asarray(measure, dtype=float)
+        rows = np.concatenate([a, b])
+        cols = np.concatenate([b, a])
+        order = np.argsort(rows * max(n_cells, 1) + cols)
+        indptr = np.concatenate([[0], np.cumsum(np.bincount(rows, minlength=n_cells))])
+        return cls(indptr, cols[order], np.concatenate([measure, measure])[order])
+
+    @property
+    def n_cells(self):
+        return self.indptr.size - 1
+
+    @property
+    def n_edges(self):
+        """Number of undirected edges."""
+        return self.indices.size // 2
+
+    @property
+    def degrees(self):
+        return np.diff(self.indptr)
+
+    def neighbours(self, i):
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def edges(self):
+        """Undirected edges as ``(a, b, measure)`` arrays with ``a < b``."""
+        rows = np.repeat(np.arange(self.n_cells), self.degrees)
+        keep = rows < self.indices
+        return rows[keep], self.indices[keep], self.measure[keep]
+
+    def to_scipy(self):
+        """The graph as a ``scipy.sparse.csr_matrix`` of facet measures."""
+        from scipy.sparse import csr_matrix
+
+        return csr_matrix((self.measure, self.indices, self.indptr), shape=(self.n_cells, self.n_cells))
+
+
+# --- Facet geometry for samplers that split cells one at a time ---
+def facet_measure(facet):
+    """Length of a (2, 2) segment or area of a (k, 3) planar polygon in cyclic order."""
+    if facet.shape[1] == 2:
+        return float(np.linalg.norm(facet[1] - facet[0]))
+    rel = facet[1:] - facet[0]
+    return float(0.5 * np.linalg.norm(np.cross(rel[:-1], rel[1:]).sum(axis=0)))
+
+
+def clip_facet(facet, n, offset, tol):
+    """Split a facet by the hyperplane ``n . x = offset``.
+
+    Returns the parts below and above the hyperplane; a part is None when
+    the facet only touches that side within ``tol``.
+    """
+    d = facet @ n - offset
+    if d.max() <= tol:
+        return facet, None
+    if d.min() >= -tol:
+        return None, facet
+    if facet.shape[1] == 2:
+        x = facet[0] + d[0] / (d[0] - d[1]) * (facet[1] - facet[0])
+        if d[0] < 0:
+            return np.array([facet[0], x]), np.array([x, facet[1]])
+        return np.array([x, facet[1]]), np.array([facet[0], x])
+    # Sutherland-Hodgman against both half-spaces of a convex polygon
+    below, above = [], []
+    k = facet.shape[0]
+    for i in range(k):
+        j = (i + 1) % k
+        if d[i] <= 0:
+            below.append(facet[i])
+        if d[i] >= 0:
+            above.append(facet[i])
+        if d[i] * d[j] < 0:
+            x = facet[i] + d[i] / (d[i] - d[j]) * (facet[j] - facet[i])
+            below.append(x)
+            above.append(x)
+    return np.array(below), np.array(above)
@@ -0,0 +1,424 @@
+# tessellations/arrangement.py
+"""Cells of a hyperplane arrangement inside a box, built from sign vectors.
+
+Every cell of the arrangement of hyperplanes {x : n_i . x = d_i} restricted
+to an axis-aligned box is identified by its sign vector, i.e. the side of
+every hyperplane it lies on. Instead of splitting cells one hyperplane at a
+time, all candidate vertices (intersections of ``dim`` hyperplanes or box
+faces) are computed in one vectorized pass, their sign vectors are hashed,
+and each vertex is attached to the 2**g cells that meet at it (g being the
+number of hyperplanes through the vertex). Grouping the incidences by hash
+gives the vertex set of every cell.
+
+The hashes are kept per vertex, so ``add_hyperplanes`` only computes the
+vertices the new hyperplanes create and the new sign bits of the old
+vertices, and ``remove_hyperplanes`` only drops vertices and bits.
+"""
+import numpy as np
+from .polytope import _fan_triangles
+
+# Hash weights are drawn from a private generator so that labelling never
+# touches the sampling random state.
+_HASH_SEED = 0x5EED
+_N_HASHES = 3
+# Arrangements size their hash weights for at least this many hyperplanes,
+# leaving room to add hyperplanes without rehashing every vertex.
+_HASH_CAPACITY = 1 << 20
+
+
+def _combinations(m, k):
+    """All k-subsets of range(m) as a (C, k) int array with ascending columns."""
+    if k == 1:
+        return np.arange(m)[:, None]
+    prev = _combinations(m, k - 1)
+    last = prev[:, -1]
+    counts = m - 1 - last
+    total = int(counts.sum())
+    offsets = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+    new = np.repeat(last + 1, counts) + offsets
+    return np.column_stack([np.repeat(prev, counts, axis=0), new])
+
+
+def _hash_weights(n, capacity=0, stream=0):
+    """(n, _N_HASHES) hash weights for sign vectors over ``n`` hyperplanes.
+
+    Integer-valued float weights keep every partial sum exactly
+    representable, so a BLAS matmul of 0/1 signs with them is an exact hash.
+    Sums stay exact for up to ``max(n, capacity)`` weights; ``stream``
+    selects an independent draw for weights added later.
+    """
+    bits = max(52 - int(np.ceil(np.log2(max(n, capacity) + 2))), 8)
+    rng = np.random.default_rng([_HASH_SEED, stream] if stream else _HASH_SEED)
+    return rng.integers(0, 2 ** bits, size=(n, _N_HASHES)).astype(float)
+
+
+def _group_rows(keys):
+    """Label identical rows of a hash array: ``(group, counts)`` as from ``np.unique(keys, axis=0)``.
+
+    Rows are sorted by a single 64-bit mix of their columns, which is much
+    faster than a row-wise unique. Different rows sharing a mix are caught by
+    comparing neighbours exactly, and then ``np.unique`` decides.
+    """
+    mixed = np.zeros(keys.shape[0], dtype=np.uint64)
+    for column in keys.T.astype(np.uint64):
+        mixed = mixed * np.uint64(0x9E3779B97F4A7C15) + column
+    order = np.argsort(mixed)
+    mixed, ordered = mixed[order], keys[order]
+    new = np.ones(order.size, dtype=bool)
+    new[1:] = mixed[1:] != mixed[:-1]
+    if np.any(~new[1:] & np.any(ordered[1:] != ordered[:-1], axis=1)):
+        _, group, counts = np.unique(keys, axis=0, return_inverse=True, return_counts=True)
+        return group.reshape(-1), counts
+    group = np.empty(order.size, dtype=np.int64)
+    group[order] = np.cumsum(new) - 1
+    return group, np.diff(np.append(np.flatnonzero(new), order.size))
+
+
+def _box_planes(lo, hi):
+    """Box faces as half-spaces A x <= b: upper faces first, then lower faces."""
+    dim = lo.size
+    eye = np.eye(dim)
+    return np.vstack([eye, -eye]), np.concatenate([hi, -lo])
+
+
+class Arrangement:
+    """Flat-array description of the cells of a hyperplane arrangement in a box.
+
+    Attributes
+    ----------
+    vertices : (V, dim) array of arrangement vertices.
+    planes : (V, dim) int array of the planes through each vertex. Indices
+        below ``n_hyperplanes`` refer to hyperplanes, the others to box faces
+        (``n_hyperplanes + j`` is the upper face of axis j and
+        ``n_hyperplanes + dim + j`` the lower face).
+    cell_ptr, cell_vertices : CSR layout of the vertex indices of every cell.
+        In 2D the vertices of each cell are in counter-clockwise order.
+    face_cell, face_normals, face_offsets, face_ptr, face_vertices : (3D only)
+        Facets of every cell as outward half-spaces ``normal . x <= offset``
+        with the vertex indices of each facet in counter-clockwise order seen
+        from outside the cell.
+    """
+
+    def __init__(self, normals, offsets, lo, hi):
+        normals = np.asarray(normals, dtype=float).reshape(-1, np.size(lo))
+        offsets = np.asarray(offsets, dtype=float).reshape(-1)
+        self.lo = lo = np.asarray(lo, dtype=float)
+        self.hi = hi = np.asarray(hi, dtype=float)
+        self.dim = dim = lo.size
+        self.n_hyperplanes = n_h = normals.shape[0]
+
+        box_a, box_b = _box_planes(lo, hi)
+        self.plane_normals = np.vstack([normals, box_a])
+        self.plane_offsets = np.concatenate([offsets, box_b])
+        self._hash_capacity = max(n_h, _HASH_CAPACITY)
+        self._weights = _hash_weights(n_h, self._hash_capacity)
+        self._n_drawn = n_h
+
+        self.vertices, self.planes = self._solve(_combinations(n_h + 2 * dim, dim))
+        self._base = self._sign_hashes(self.vertices, self.planes, np.arange(n_h))
+        self._build_cells()
+
+    @property
+    def n_cells(self):
+        return self.cell_ptr.size - 1
+
+    def add_hyperplanes(self, normals, offsets):
+        """Insert hyperplanes ``normals[i] . x = offsets[i]`` and rebuild the cells.
+
+        New hyperplanes take indices ``n_hyperplanes ..``. Only vertices on a
+        new hyperplane are computed, and existing vertices only gain the sign
+        bits of the new hyperplanes.
+        """
+        normals = np.asarray(normals, dtype=float).reshape(-1, self.dim)
+        offsets = np.asarray(offsets, dtype=float).reshape(-1)
+        dim, n_old, k = self.dim, self.n_hyperplanes, normals.shape[0]
+        if k == 0:
+            return self
+        n_h = n_old + k
+        # Box faces move up past the new hyperplanes
+        planes = np.where(self.planes >= n_old, self.planes + k, self.planes)
+        self.plane_normals = np.vstack([self.plane_normals[:n_old], normals, self.plane_normals[n_old:]])
+        self.plane_offsets = np.concatenate([self.plane_offsets[:n_old], offsets, self.plane_offsets[n_old:]])
+        self.n_hyperplanes = n_h
+
+        if n_h > self._hash_capacity:
+            # Sums would no longer be exact: rehash everything with smaller weights
+            self._hash_capacity = 2 * n_h
+            self._weights = _hash_weights(n_h, self._hash_capacity)
+            self._n_drawn = n_h
+            base = self._sign_hashes(self.vertices, planes, np.arange(n_h))
+        else:
+            self._weights = np.vstack([self._weights, _hash_weights(k, self._hash_capacity, stream=self._n_drawn)])
+            self._n_drawn += k
+            base = self._base + self._sign_hashes(self.vertices, planes, np.arange(n_old, n_h))
+
+        # Vertices on at least one new hyperplane: j new planes and dim - j others
+        others = np.concatenate([np.arange(n_old), np.arange(n_h, n_h + 2 * dim)])
+        combos = []
+        for j in range(1, dim + 1):
+            new = n_old + _combinations(k, j)
+            if j == dim:
+                combos.append(new)
+                continue
+            rest = others[_combinations(others.size, dim - j)]
+            combos.append(np.column_stack([np.repeat(new, rest.shape[0], axis=0), np.tile(rest, (new.shape[0], 1))]))
+        verts, new_planes = self._solve(np.sort(np.concatenate(combos), axis=1))
+
+        self.vertices = np.vstack([self.vertices, verts])
+        self.planes = np.vstack([planes, new_planes])
+        self._base = np.vstack([base, self._sign_hashes(verts, new_planes, np.arange(n_h))])
+        self._build_cells()
+        return self
+
+    def remove_hyperplanes(self, keep):
+        """Keep only the hyperplanes where the boolean mask ``keep`` is set and rebuild the cells.
+
+        Vertices on a removed hyperplane disappear and the cells on either
+        side of it merge; the remaining hyperplanes are renumbered in order.
+        """
+        keep = np.asarray(keep, dtype=bool).reshape(-1)
+        removed, kept = np.flatnonzero(~keep), np.flatnonzero(keep)
+        if removed.size == 0:
+            return self
+        plane_keep = np.concatenate([keep, np.ones(2 * self.dim, dtype=bool)])
+        on_kept = plane_keep[self.planes].all(axis=1)
+        verts, old_planes = self.vertices[on_kept], self.planes[on_kept]
+        # Subtract the removed bits, or rehash against the kept planes if that is cheaper
+        if removed.size < kept.size:
+            base = self._base[on_kept] - self._sign_hashes(verts, old_planes, removed)
+
+        self.plane_normals = self.plane_normals[plane_keep]
+        self.plane_offsets = self.plane_offsets[plane_keep]
+        self._weights = self._weights[keep]
+        self.n_hyperplanes = kept.size
+        self.vertices = verts
+        self.planes = (np.cumsum(plane_keep) - 1)[old_planes]
+        if removed.size >= kept.size:
+            base = self._sign_hashes(verts, self.planes, np.arange(kept.size))
+        self._base = base
+        self._build_cells()
+        return self
+
+    def _solve(self, combos):
+        """Intersection points of the ``dim`` planes of every combination lying in the box."""
+        a, b = self.plane_normals, self.plane_offsets
+        mats = a[combos]
+        det = np.linalg.det(mats) if combos.size else np.zeros(0)
+        ok = np.abs(det) > 1e-12
+        combos, mats = combos[ok], mats[ok]
+        pts = np.linalg.solve(mats, b[combos][..., None])[..., 0] if combos.size else np.zeros((0, self.dim))
+
+        lo, hi = self.lo, self.hi
+        tol = 1e-9 * max(float(np.max(hi - lo)), 1.0)
+        inside = np.all((pts >= lo - tol) & (pts <= hi + tol), axis=1)
+        return np.clip(pts[inside], lo, hi), combos[inside]
+
+    def _sign_hashes(self, verts, planes, index):
+        """Hash of the signs of ``verts`` against the hyperplanes in ``index``.
+
+        Hyperplanes through a vertex (listed in ``planes``) count as negative;
+        the completion step in ``_label_cells`` decides their sides.
+        """
+        n_h = self.n_hyperplanes
+        normals, offsets = self.plane_normals[index], self.plane_offsets[index]
+        weights = self._weights[index]
+        column = np.full(n_h, -1)
+        column[index] = np.arange(index.size)
+        base = np.zeros((verts.shape[0], _N_HASHES), dtype=float)
+        chunk = max(1, (1 << 22) // max(index.size, 1))
+        for start in range(0, verts.shape[0] if index.size else 0, chunk):
+            sl = slice(start, start + chunk)
+            positive = (verts[sl] @ normals.T - offsets) > 0
+            gens = planes[sl]
+            for k in range(self.dim):
+                rows = np.flatnonzero(gens[:, k] < n_h)
+                cols = column[gens[rows, k]]
+                positive[rows[cols >= 0], cols[cols >= 0]] = False
+            base[sl] = positive.astype(float) @ weights
+        return base
+
+    def _build_cells(self):
+        self._label_cells()
+        if self.dim == 2:
+            self._order_polygons()
+        else:
+            self._build_facets()
+
+    def _label_cells(self):
+        dim, n_h = self.dim, self.n_hyperplanes
+        planes, base, weights = self.planes, self._base, self._weights
+
+        # Hyperplanes precede box faces in each ascending combination, so the
+        # hyperplanes through a vertex are its first ``n_gen`` plane indices.
+        n_gen = (planes < n_h).sum(axis=1)
+        inc_vertex, inc_keys, inc_signs = [], [], []
+        for g in range(dim + 1):
+            sel = np.flatnonzero(n_gen == g)
+            if sel.size == 0:
+                continue
+            for mask in range(2 ** g):
+                signs = np.ones((sel.size, dim), dtype=np.int8)
+                key = base[sel].copy()
+                for k in range(g):
+                    if mask >> k & 1:
+                        key += weights[planes[sel, k]]
+                    else:
+                        signs[:, k] = -1
+                inc_vertex.append(sel)
+                inc_keys.append(key)
+                inc_signs.append(signs)
+
+        inc_vertex = np.concatenate(inc_vertex)
+        inc_keys = np.concatenate(inc_keys)
+        inc_signs = np.concatenate(inc_signs)
+
+        cell_of, counts = _group_rows(inc_keys)
+
+        # Drop numerically degenerate groups that cannot bound a cell
+        valid = counts >= dim + 1
+        remap = np.cumsum(valid) - 1
+        keep = valid[cell_of]
+        cell_of = remap[cell_of[keep]]
+        inc_vertex, inc_signs = inc_vertex[keep], inc_signs[keep]
+
+        order = np.argsort(cell_of, kind="stable")
+        self.inc_cell = cell_of[order]
+        self.inc_vertex = inc_vertex[order]
+        self.inc_signs = inc_signs[order]
+        n_cells = int(valid.sum())
+        self.cell_ptr = np.concatenate([[0], np.cumsum(np.bincount(self.inc_cell, minlength=n_cells))])
+        self.cell_vertices = self.inc_vertex
+
+    def _order_polygons(self):
+        pts = self.vertices[self.inc_vertex]
+        counts = np.diff(self.cell_ptr)
+        centre = np.add.reduceat(pts, self.cell_ptr[:-1], axis=0) / counts[:, None]
+        rel = pts - centre[self.inc_cell]
+        angle = np.arctan2(rel[:, 1], rel[:, 0])
+        order = np.lexsort((angle, self.inc_cell))
+        self.cell_vertices = self.inc_vertex[order]
+
+    def _build_facets(self):
+        dim, n_h = self.dim, self.n_hyperplanes
+
+        # Every incidence contributes its vertex to the facet on each of the
+        # planes through it; the cell lies on side ``sign`` of hyperplanes.
+        f_cell = np.repeat(self.inc_cell, dim)
+        f_vertex = np.repeat(self.inc_vertex, dim)
+        f_plane = self.planes[self.inc_vertex].reshape(-1)
+        f_sign = self.inc_signs.reshape(-1).astype(float)
+
+        key = f_cell.astype(np.int64) * (n_h + 2 * dim) + f_plane
+        uniq, face_of, counts = np.unique(key, return_inverse=True, return_counts=True)
+        face_of = face_of.reshape(-1)
+
+        face_cell = uniq // (n_h + 2 * dim)
+        face_plane = uniq % (n_h + 2 * dim)
+        sign = np.ones(uniq.size)
+        # All incidences of a facet agree on the sign, so any one will do
+        first = np.empty(uniq.size, dtype=np.int64)
+        first[face_of] = np.arange(face_of.size)
+        sign[face_plane < n_h] = -f_sign[first][face_plane < n_h]
+        normals = self.plane_normals[face_plane] * sign[:, None]
+        offsets = self.plane_offsets[face_plane] * sign
+
+        # Keep genuine 2-dimensional facets only
+        valid = counts >= 3
+        remap = np.cumsum(valid) - 1
+        keep = valid[face_of]
+        face_of = remap[face_of[keep]]
+        f_vertex = f_vertex[keep]
+        face_cell, normals, offsets = face_cell[valid], normals[valid], offsets[valid]
+
+        # Counter-clockwise order around the outward normal
+        pts = self.vertices[f_vertex]
+        counts = np.bincount(face_of, minlength=face_cell.size)
+        centre = np.zeros((face_cell.size, dim))
+        np.add.at(centre, face_of, pts)
+        centre /= counts[:, None]
+        helper = np.where(np.abs(normals[:, :1]) < 0.9, np.array([[1.0, 0.0, 0.0]]), np.array([[0.0, 1.0, 0.0]]))
+        u = np.cross(normals, helper)
+        u /= np.linalg.norm(u, axis=1, keepdims=True)
+        w = np.cross(normals, u)
+        rel = pts - centre[face_of]
+        angle = np.arctan2(np.einsum("ij,ij->i", rel, w[face_of]), np.einsum("ij,ij->i", rel, u[face_of]))
+        order = np.lexsort((angle, face_of))
+
+        self.face_cell = face_cell
+        self.face_normals = normals
+        self.face_offsets = offsets
+        self.face_ptr = np.concatenate([[0], np.cumsum(counts)])
+        self.face_vertices = f_vertex[order]
+        self.cell_face_ptr = np.concatenate([[0], np.cumsum(np.bincount(face_cell, minlength=self.n_cells))])
+
+    def packed(self):
+        """Cells in the flat layout of ``polytope.pack_polytopes`` (3D only).
+
+        Every cell gets its own copy of its vertices; facet vertex indices
+        point into that buffer.
+        """
+        n_v = self.vertices.shape[0]
+        key = self.inc_cell.astype(np.int64) * n_v + self.inc_vertex
+        order = np.argsort(key)
+        face_key = np.repeat(self.face_cell, np.diff(self.face_ptr)).astype(np.int64) * n_v + self.face_vertices
+        return {
+            "vertices": self.vertices[self.inc_vertex],
+            "vertex_ptr": self.cell_ptr,
+            "face_ptr": self.face_ptr,
+            "face_vertices": order[np.searchsorted(key[order], face_key)],
+            "cell_face_ptr": self.cell_face_ptr,
+            "normals": self.face_normals,
+            "offsets": self.face_offsets,
+        }
+
+    def adjacency(self):
+        """Pairs of cells sharing a facet, as ``(a, b, measure)`` arrays.
+
+        Both cells on either side of a facet list it with the same vertex
+        set, so facets are matched by an exact hash of their vertex indices;
+        facets on the box have no partner. ``measure`` is the facet's length
+        (2D) or area (3D).
+        """
+        weights = _hash_weights(self.vertices.shape[0])
+        if self.dim == 2:
+            # Facets are the polygon edges between consecutive vertices
+            ids = self.cell_vertices
+            nxt = np.arange(1, ids.size + 1)
+            nxt[self.cell_ptr[1:] - 1] = self.cell_ptr[:-1]
+            face_cell = np.repeat(np.arange(self.n_cells), np.diff(self.cell_ptr))
+            keys = weights[ids] + weights[ids[nxt]]
+            measure = np.linalg.norm(self.vertices[ids[nxt]] - self.vertices[ids], axis=1)
+        else:
+            face_cell = self.face_cell
+            keys = np.add.reduceat(weights[self.face_vertices], self.face_ptr[:-1], axis=0)
+            tris, face_of = _fan_triangles(self.face_ptr, self.face_vertices)
+            v = self.vertices
+            area = 0.5 * np.linalg.norm(np.cross(v[tris[:, 1]] - v[tris[:, 0]], v[tris[:, 2]] - v[tris[:, 0]]), axis=1)
+            measure = np.bincount(face_of, weights=area, minlength=face_cell.size)
+
+        facet, counts = _group_rows(keys)
+        shared = np.flatnonzero(counts[facet] == 2)
+        shared = shared[np.argsort(facet[shared], kind="stable")]
+        return face_cell[shared[0::2]], face_cell[shared[1::2]], measure[shared[0::2]]
+
+    def polygons(self):
+        """Cells as a list of shapely polygons (2D only)."""
+        import shapely
+
+        rings = shapely.linearrings(self.vertices[self.cell_vertices], indices=np.repeat(np.arange(self.n_cells), np.diff(self.cell_ptr)))
+        return list(shapely.polygons(rings))
+
+    def iter_polyhedra(self):
+        """Yield ``(vertices, faces, normals, offsets)`` for every cell (3D only).
+
+        ``faces`` is a list of index arrays into the cell's own ``vertices``.
+        """
+        for c in range(self.n_cells):
+            f0, f1 = self.cell_face_ptr[c], self.cell_face_ptr[c + 1]
+            global_faces = [self.face_vertices[self.face_ptr[f]:self.face_ptr[f + 1]] for f in range(f0, f1)]
+            ids, local = np.unique(np.concatenate(global_faces), return_inverse=True)
+            faces, pos = [], 0
+            for gf in global_faces:
+                faces.append(local[pos:pos + gf.size])
+                pos += gf.size
+            yield self.vertices[ids], faces, self.face_normals[f0:f1], self.face_offsets[f0:f1]
@@ -1,25 +1,48 @@
 # tessellations/base.py
+from collections import namedtuple
 import numpy as np
-import pyvista as pv
-import matplotlib.pyplot as plt
-import time
-from matplotlib.patches import Rectangle
+from .profiling import NO_PHASE, Profile
+
+# Events of ``Tessellation.iter_events``. ``time`` is when the cut happened
+# and ``birth``/``death`` when the cell appeared and when it would next be
+# split (after the stop time); all three are None for Poisson tessellations.
+Cut = namedtuple("Cut", ["time", "point", "normal"])
+Cell = namedtuple("Cell", ["cell", "birth", "death"])
 
 class Tessellation:
-    """A base class for 2D and 3D tessellations."""
-    def __init__(self, dim, direction_matrix=None):
+    """A base class for 2D and 3D tessellations.
+
+    ``rng`` seeds the random stream used by ``sample``: an int, a
+    ``numpy.random.SeedSequence``, a ``numpy.random.Generator`` or None for
+    fresh OS entropy.
+
+    ``bounds`` sets the observation window, [minx, miny, maxx, maxy] in 2D
+    or [xmin, xmax, ymin, ymax, zmin, zmax] in 3D; it defaults to the unit
+    square or cube.
+    """
+    def __init__(self, dim, direction_matrix=None, rng=None, bounds=None):
         if dim not in [2, 3]:
             raise ValueError("Dimension must be 2 or 3.")
         self.dim = dim
-        if self.dim == 2:
+        self.seed = None if isinstance(rng, np.random.Generator) else rng
+        self.rng = np.random.default_rng(rng)
+        if bounds is not None:
+            self.bounds = _check_bounds(bounds, dim)
+        elif self.dim == 2:
             self.bounds = [0, 0, 1, 1]  # minx, miny, maxx, maxy
         else:
             self.bounds = [0, 1, 0, 1, 0, 1]  # xmin, xmax, ymin, ymax, zmin, zmax
         self.cells = []
         self.hyperplanes = []
+        self.profile = None  # a Profile while profiling is enabled
+        self.track_adjacency = False
+        self.adjacency = None  # an Adjacency after sampling with tracking enabled
+        self.track_split_tree = False
+        self.split_tree = None  # a SplitTree after sampling STIT or Mondrian with tracking enabled
 
         # Optional directional distribution over normals
-        self.direction_unit_vectors = None  # shape (k, dim)
+        self._direction_matrix = None  # raw rows, possibly memory-mapped
+        self._direction_unit_vectors = None
         self.direction_probabilities = None  # shape (k,)
         if direction_matrix is not None:
             self._set_direction_matrix(direction_matrix)
@@ -28,108 +51,97 @@ class Tessellation:
         """The core method to be implemented by subclasses."""
         raise NotImplementedError("Subclasses must implement the sample method.")
 
-    def visualize(self, animate=False):
+    def iter_events(self, *args, retain=True, **kwargs):
+        """Sample as ``sample(*args, **kwargs)`` does, yielding events as they are decided.
+
+        Every cut hyperplane is yielded as a ``Cut`` and every cell of the
+        final tessellation as a ``Cell`` as soon as it is known to outlive
+        the stop time. With ``retain=False`` nothing is kept on the
+        tessellation, so memory stays bounded by the cells still being split;
+        ``cells``, ``hyperplanes``, ``split_tree`` and ``adjacency`` are then
+        left empty, and a non-retaining run cannot be resumed with STIT
+        ``extend`` or Poisson ``refine``/``thin``. With ``retain=True`` they
+        are set once the iterator is exhausted, exactly as after ``sample``.
+        """
+        for (times, points, normals), (cells, births, deaths) in self._run(*args, retain=retain, **kwargs):
+            for time, point, normal in zip(times, points, normals):
+                yield Cut(time, point, normal)
+            for cell, birth, death in zip(cells, births, deaths):
+                yield Cell(cell, birth, death)
+
+    def iter_cells(self, *args, retain=True, **kwargs):
+        """Like ``iter_events`` but yields only the ``Cell`` events."""
+        for event in self.iter_events(*args, retain=retain, **kwargs):
+            if isinstance(event, Cell):
+                yield event
+
+    def _run(self, *args, retain=True, **kwargs):
+        """Generator behind ``sample`` and ``iter_events``.
+
+        Yields ``(cuts, cells)`` blocks: ``cuts`` is ``(times, points,
+        normals)`` and ``cells`` is ``(cells, births, deaths)``, each a tuple
+        of equal-length sequences.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support streaming.")
+
+    def enable_profiling(self, enabled=True):
+        """Record phase timings and counters in ``self.profile`` on every ``sample()``.
+
+        After sampling, ``self.profile.report()`` returns them as a dict and
+        ``self.profile.format()`` as a table.
+        """
+        self.profile = Profile() if enabled else None
+        return self
+
+    def enable_adjacency(self, enabled=True):
+        """Record which cells share a facet in ``self.adjacency`` on every ``sample()``.
+
+        The graph is built while sampling (see ``tessellations.adjacency``);
+        tracking is off by default because it adds to the sampling time.
+        """
+        self.track_adjacency = enabled
+        return self
+
+    def enable_split_tree(self, enabled=True):
+        """Keep the cuts of every STIT or Mondrian ``sample()`` as a BSP tree in ``self.split_tree``.
+
+        The tree (see ``tessellations.splittree``) answers batched
+        ``locate`` queries; it is off by default because its arrays add to
+        the peak memory of sampling.
+        """
+        self.track_split_tree = enabled
+        return self
+
+    def _phase(self, name):
+        """Timer for one phase of sampling; a no-op when profiling is off."""
+        return NO_PHASE if self.profile is None else self.profile.phase(name)
+
+    def visualize(self, animate=False, filename=None, fps=2):
         """Visualizes the tessellation.
 
-        If animate is True, plot generated hyperplanes one by one.
+        If animate is True, plot generated hyperplanes one by one, one frame
+        every ``1 / fps`` seconds. If ``filename`` is given, render off
+        screen and write the image (or, when animating, the GIF or video)
+        there instead of opening a window.
         """
-        if not animate:
-            if self.dim == 2:
-                if not self.cells:
-                    print("No cells to visualize. Run the .sample() method first.")
-                    return
-                fig, ax = plt.subplots()
-                for cell in self.cells:
-                    x, y = cell.exterior.xy
-                    ax.fill(x, y, facecolor='w', edgecolor='k', linewidth=0.7)
-                ax.set_aspect('equal', 'box')
-                ax.axis('off')
-                plt.show()
-            else: # 3D
-                if not self.hyperplanes:
-                    print("No hyperplanes to visualize. Run the .sample() method first.")
-                    return
-                
-                plotter = pv.Plotter(window_size=[1024, 1024])
-                plotter.set_background('white')
-
-                box = pv.Box(bounds=self.bounds)
-                
-                slices = []
-                outlines = []
-                for p, n in self.hyperplanes:
-                    slice_outline = box.slice(normal=n, origin=p)
-                    if slice_outline.n_points > 0:
-                        filled_slice = slice_outline.delaunay_2d()
-                        slices.append(filled_slice)
-                        outlines.append(slice_outline)
-
-                for s in slices:
-                    plotter.add_mesh(s, color='darkgrey', show_edges=False)
-
-                for o in outlines:
-                    plotter.add_mesh(o, color='k', line_width=1)
-
-                plotter.add_mesh(box, style='wireframe', color='black', line_width=2)
-                
-                plotter.enable_lightkit()
-                
-                plotter.camera_position = 'iso'
-                plotter.enable_parallel_projection()
-                
-                plotter.show()
-            return
-
-        # Animated visualization
-        if self.dim == 2:
+        # Rendering backends are only imported once something is drawn
+        from . import render
+        if animate:
             if not self.hyperplanes:
                 print("No hyperplanes to animate. Run the .sample() method first.")
                 return
-            minx, miny, maxx, maxy = self.bounds
-            diag = float(np.hypot(maxx - minx, maxy - miny))
-            length = 2.0 * diag
-
-            fig, ax = plt.subplots()
-            ax.set_xlim(minx, maxx)
-            ax.set_ylim(miny, maxy)
-            ax.set_aspect('equal', 'box')
-            ax.axis('off')
-            ax.add_patch(Rectangle((minx, miny), maxx - minx, maxy - miny, fill=False, edgecolor='black', linewidth=2))
-
-            plt.show(block=False)
-            for p, n in self.hyperplanes:
-                n = np.asarray(n, dtype=float)
-                t = np.array([-n[1], n[0]], dtype=float)
-                tn = t / (np.linalg.norm(t) + 1e-12)
-                p = np.asarray(p, dtype=float)
-                a = p - tn * length
-                b = p + tn * length
-                ax.plot([a[0], b[0]], [a[1], b[1]], color='k', linewidth=1)
-                plt.pause(0.5)
-            plt.show()
-        else:
+            render.animate(self, filename=filename, fps=fps)
+        elif self.dim == 2:
+            # Checking hyperplanes first avoids building lazy cell lists
+            if not self.hyperplanes and not self.cells:
+                print("No cells to visualize. Run the .sample() method first.")
+                return
+            render.render_2d(self, filename=filename)
+        else: # 3D
             if not self.hyperplanes:
-                print("No hyperplanes to animate. Run the .sample() method first.")
+                print("No hyperplanes to visualize. Run the .sample() method first.")
                 return
-            plotter = pv.Plotter(window_size=[1024, 1024])
-            plotter.set_background('white')
-            box = pv.Box(bounds=self.bounds)
-            plotter.add_mesh(box, style='wireframe', color='black', line_width=2)
-            plotter.enable_lightkit()
-            plotter.camera_position = 'iso'
-            plotter.enable_parallel_projection()
-            plotter.show(auto_close=False, interactive_update=True)
-            time.sleep(0.5)
-            added_meshes = []
-            for p, n in self.hyperplanes:
-                slice_outline = box.slice(normal=np.asarray(n, dtype=float), origin=np.asarray(p, dtype=float))
-                if slice_outline.n_points > 0:
-                    filled_slice = slice_outline.delaunay_2d()
-                    added_meshes.append(plotter.add_mesh(filled_slice, color='darkgrey', show_edges=False))
-                    added_meshes.append(plotter.add_mesh(slice_outline, color='k', line_width=1))
-                    plotter.update()
-                    time.sleep(0.5)
-            plotter.show()
+            render.render_3d(self, filename=filename)
 
     # --- Directional distribution helpers ---
     def _set_direction_matrix(self, direction_matrix):
@@ -139,33 +151,118 @@ class Tessellation:
         the weight. Vectors are normalized to unit length for use as normals.
         Weights are normalized to sum to 1; if renormalization is required,
         a message is printed.
+
+        A memory-mapped array (e.g. ``np.load(path, mmap_mode='r')``) is used
+        in place: only the row norms and an alias table are held in memory,
+        and sampled rows are normalized as they are drawn.
         """
-        mat = np.asarray(direction_matrix, dtype=float)
+        mat = np.asarray(direction_matrix)
+        if mat.dtype.kind != 'f':
+            mat = mat.astype(float)
         if mat.ndim != 2:
             raise ValueError("Direction matrix must be 2D (rows = directions, cols = dimensions).")
         if mat.shape[1] != self.dim:
             raise ValueError(f"Direction matrix must have exactly {self.dim} columns; got {mat.shape[1]}.")
 
-        # Compute norms (weights) and filter out zero rows (zero weight)
-        row_norms = np.linalg.norm(mat, axis=1)
+        # Compute norms (weights) in chunks so large matrices are streamed
+        row_norms = np.empty(mat.shape[0], dtype=float)
+        chunk = 1 << 20
+        for start in range(0, mat.shape[0], chunk):
+            row_norms[start:start + chunk] = np.linalg.norm(np.asarray(mat[start:start + chunk], dtype=float), axis=1)
+
+        # Zero rows have zero weight and are never drawn
         positive_mask = row_norms > 0
         if not np.any(positive_mask):
             raise ValueError("Direction matrix contains no non-zero rows; cannot form a distribution.")
 
-        unit_vectors = mat[positive_mask] / row_norms[positive_mask][:, None]
-        weights = row_norms[positive_mask]
-        weight_sum = float(weights.sum())
+        weight_sum = float(row_norms.sum())
         if not np.isclose(weight_sum, 1.0):
             print(f"Note: Directional weights normalized to sum to 1 (original sum = {weight_sum:.6f}).")
-        probabilities = weights / weight_sum
+        probabilities = row_norms / weight_sum
+
+        self._direction_matrix = mat
+        self._direction_norms = row_norms
+        self._direction_support = np.flatnonzero(positive_mask)
+        self._direction_unit_vectors = None
+        self.direction_probabilities = probabilities[self._direction_support]
+        self._alias_prob, self._alias_index = _build_alias_table(probabilities)
+
+    @property
+    def direction_unit_vectors(self):
+        """Unit directions with non-zero weight, shape (k, dim), or None if isotropic."""
+        if self._direction_matrix is None:
+            return None
+        if self._direction_unit_vectors is None:
+            rows = self._direction_support
+            self._direction_unit_vectors = (
+                np.asarray(self._direction_matrix[rows], dtype=float) / self._direction_norms[rows][:, None]
+            )
+        return self._direction_unit_vectors
 
-        self.direction_unit_vectors = unit_vectors
-        self.direction_probabilities = probabilities
+    def sample_directions(self, k):
+        """Sample ``k`` unit directions as a (k, dim) array.
+
+        Uses the alias table of the configured distribution, or normalizes a
+        block of Gaussian vectors when directions are isotropic.
+        """
+        if self._direction_matrix is None:
+            v = self.rng.standard_normal(size=(k, self.dim))
+            return v / np.linalg.norm(v, axis=1, keepdims=True)
+        cols = self.rng.integers(0, self._alias_prob.size, size=k)
+        keep = self.rng.uniform(size=k) < self._alias_prob[cols]
+        idx = np.where(keep, cols, self._alias_index[cols])
+        rows = np.asarray(self._direction_matrix[idx], dtype=float)
+        return rows / self._direction_norms[idx][:, None]
 
     def _sample_direction(self):
         """Sample a unit direction according to the configured distribution, or isotropically if none."""
-        if self.direction_unit_vectors is None or self.direction_probabilities is None:
-            v = np.random.standard_normal(size=self.dim)
-            return v / np.linalg.norm(v)
-        idx = np.random.choice(self.direction_unit_vectors.shape[0], p=self.direction_probabilities)
-        return self.direction_unit_vectors[idx]
\ No newline at end of file
+        return self.sample_directions(1)[0]
+
+
+def _check_bounds(bounds, dim):
+    """Validate window bounds in ``Tessellation.bounds`` layout and return them as floats."""
+    bounds = [float(b) for b in bounds]
+    if len(bounds) != 2 * dim:
+        raise ValueError(f"Bounds must have {2 * dim} values for dimension {dim}; got {len(bounds)}.")
+    if dim == 2:
+        lo, hi = bounds[:2], bounds[2:]
+    else:
+        lo, hi = bounds[0::2], bounds[1::2]
+    if not all(a < b for a, b in zip(lo, hi)):
+        raise ValueError(f"Bounds must have positive extent along every axis; got {bounds}.")
+    return bounds
+
+
+def _build_alias_table(probabilities):
+    """Build a Walker/Vose alias table for a discrete distribution.
+
+    Returns ``(prob, alias)``: draw a column ``i`` uniformly, keep it with
+    probability ``prob[i]`` and otherwise take ``alias[i]``. Small columns
+    are paired with large ones in vectorized rounds: each large column
+    absorbs every small column whose deficit starts within its surplus.
+    """
+    k = probabilities.size
+    scaled = np.asarray(probabilities, dtype=float) * k
+    prob = np.ones(k, dtype=float)
+    alias = np.arange(k)
+
+    small = np.flatnonzero(scaled < 1.0)
+    large = np.flatnonzero(scaled >= 1.0)
+    while small.size and large.size:
+        deficit = 1.0 - scaled[small]
+        start = np.cumsum(deficit) - deficit
+        owner = np.searchsorted(np.cumsum(scaled[large] - 1.0), start, side='right')
+        fits = owner < large.size
+
+        s = small[fits]
+        prob[s] = scaled[s]
+        alias[s] = large[owner[fits]]
+        scaled[large] -= np.bincount(owner[fits], weights=deficit[fits], minlength=large.size)
+
+        # Columns left over by round-off keep themselves; donors pushed
+        # below 1 become the small columns of the next round
+        prob[small[~fits]] = 1.0
+        small = large[scaled[large] < 1.0]
+        large = large[scaled[large] >= 1.0]
+
+    return prob, alias
@@ -0,0 +1,159 @@
+# tessellations/cache.py
+"""Content-addressed on-disk cache of sampled tessellations.
+
+``SampleCache.sample(tess, *args)`` stands in for ``tess.sample(*args)``.
+The key hashes everything that determines the realization: the class,
+dimension, window, directional distribution, sampling arguments and the
+state of ``tess.rng``. A miss samples and stores the result with
+``storage.save``; a hit returns the stored ``LoadedTessellation``, whose
+arrays are memory-mapped, so repeated runs take milliseconds:
+
+    from tessellations.cache import SampleCache
+    cache = SampleCache("~/.cache/tessellations", max_bytes=2 << 30)
+    tess = cache.sample(STITTessellation(2, rng=0), 20)
+
+Entries are single ``.npz`` files named by their key. Reading an entry
+refreshes its modification time, and the least recently used entries are
+deleted once the directory holds more than ``max_bytes``.
+"""
+import hashlib
+import inspect
+import json
+import os
+import zipfile
+import numpy as np
+from .storage import FORMAT_VERSION, load, save
+
+# Sampling arguments that do not change the result
+_IGNORED_ARGUMENTS = ("workers",)
+
+
+def _update_array(digest, array):
+    """Feed an array's dtype, shape and bytes to a hash, in chunks."""
+    array = np.asarray(array)
+    digest.update(f"{array.dtype.str}{array.shape}".encode())
+    rows = array.reshape(array.shape[0], -1) if array.ndim else array.reshape(1, 1)
+    chunk = max(1, (1 << 24) // max(rows[:1].nbytes, 1))
+    for start in range(0, rows.shape[0], chunk):
+        digest.update(np.ascontiguousarray(rows[start:start + chunk]).tobytes())
+
+
+def cache_key(tess, *args, **kwargs):
+    """Hex digest identifying the realization ``tess.sample(*args, **kwargs)`` would produce."""
+    cls = type(tess)
+    # Key on the bound arguments with defaults filled in, so that
+    # sample(20), sample(stop_time=20) and sample(20, tiles=None) agree
+    bound = inspect.signature(tess.sample).bind(*args, **kwargs)
+    bound.apply_defaults()
+    arguments = {name: value for name, value in bound.arguments.items() if name not in _IGNORED_ARGUMENTS}
+    header = {
+        "format_version": FORMAT_VERSION,
+        "class": f"{cls.__module__}.{cls.__qualname__}",
+        "dim": tess.dim,
+        "bounds": [float(b) for b in tess.bounds],
+        "arguments": arguments,
+        "rng": tess.rng.bit_generator.state,
+    }
+    if tess.track_split_tree:
+        # Entries sampled with the tree also store it
+        header["split_tree"] = True
+    digest = hashlib.sha256(json.dumps(header, sort_keys=True, default=repr).encode())
+    if tess.direction_probabilities is not None:
+        _update_array(digest, tess.direction_unit_vectors)
+        _update_array(digest, tess.direction_probabilities)
+    return digest.hexdigest()
+
+
+class SampleCache:
+    """Directory of sampled tessellations keyed by ``cache_key``, with LRU eviction."""
+
+    def __init__(self, directory, max_bytes=1 << 30):
+        self.directory = os.path.expanduser(str(directory))
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.directory, exist_ok=True)
+
+    def path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+    def sample(self, tess, *args, **kwargs):
+        """Return the cached realization of ``tess.sample(*args, **kwargs)``, sampling it on a miss.
+
+        A hit returns a read-only ``LoadedTessellation``, with the split tree
+        if ``tess`` tracks one, and leaves ``tess`` untouched. Unseeded tessellations bypass the cache, since their key
+        comes from fresh OS entropy and could never be hit again, and so do
+        runs that track adjacency, since the stored format has no adjacency
+        graph.
+        """
+        if tess.seed is None or tess.track_adjacency:
+            return tess.sample(*args, **kwargs)
+        key = cache_key(tess, *args, **kwargs)
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+        tess.sample(*args, **kwargs)
+        self.put(key, tess)
+        return tess
+
+    def get(self, key):
+        """The stored tessellation for ``key``, or None. Unreadable entries are deleted."""
+        path = self.path(key)
+        try:
+            tess = load(path)
+        except OSError:
+            return None
+        except (ValueError, KeyError, zipfile.BadZipFile):
+            # A corrupt or truncated entry counts as a miss and is re-sampled
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            return None
+        os.utime(path)  # mark as recently used
+        return tess
+
+    def put(self, key, tess):
+        """Store a sampled tessellation under ``key`` and evict old entries."""
+        # Write to a private name first so readers never see a partial file
+        tmp = os.path.join(self.directory, f".{key}.{os.getpid()}.npz")
+        try:
+            save(tess, tmp)
+            os.replace(tmp, self.path(key))
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        self.evict()
+
+    def entries(self):
+        """``(path, size, last_used)`` of every entry, least recently used first."""
+        found = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".npz") and not entry.name.startswith("."):
+                stat = entry.stat()
+                found.append((entry.path, stat.st_size, stat.st_mtime))
+        return sorted(found, key=lambda item: item[2])
+
+    @property
+    def size(self):
+        """Total bytes held by the cache."""
+        return sum(size for _, size, _ in self.entries())
+
+    def evict(self, max_bytes=None):
+        """Delete least recently used entries until at most ``max_bytes`` remain."""
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= limit:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # removed by another process
+            total -= size
+
+    def clear(self):
+        self.evict(0)
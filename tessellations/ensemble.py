@@ -0,0 +1,86 @@
+# tessellations/ensemble.py
+"""Reproducible ensembles of independent tessellation realizations.
+
+Every replicate draws from its own ``numpy.random.Generator``, spawned from
+one ``SeedSequence``, so the results for a given seed are bit-identical no
+matter how the replicates are spread over worker processes. Workers only
+send back the (small) output of a summary function, never the cell lists.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from .mondrian import MondrianTessellation
+from .poisson import PoissonTessellation
+from .stats import cell_measures
+from .stit import STITTessellation
+
+TESSELLATIONS = {
+    "poisson": PoissonTessellation,
+    "stit": STITTessellation,
+    "mondrian": MondrianTessellation,
+}
+
+
+def summarize(tess):
+    """Default per-replicate summary: cell and hyperplane counts and cell measures."""
+    return {
+        "n_cells": len(tess.cells) if not hasattr(tess, "cell_bounds") else len(tess.cell_bounds),
+        "n_hyperplanes": len(tess.hyperplanes),
+        "cell_measures": cell_measures(tess),
+    }
+
+
+# Per-process state, set up once by the pool initializer
+_worker = {}
+
+
+def _init_worker(kind, dim, direction_matrix, summary, bounds=None):
+    _worker["tess"] = TESSELLATIONS[kind](dim, direction_matrix=direction_matrix, bounds=bounds)
+    _worker["summary"] = summary
+
+
+def _run_replicates(task):
+    param, seeds = task
+    tess, summary = _worker["tess"], _worker["summary"]
+    results = []
+    for seq in seeds:
+        tess.seed = seq
+        tess.rng = np.random.default_rng(seq)
+        tess.sample(param)
+        results.append(summary(tess))
+    return results
+
+
+def run_ensemble(kind, dim, param, n, seed=None, workers=1, direction_matrix=None,
+                 summary=summarize, chunk_size=None, bounds=None):
+    """Sample ``n`` independent realizations and return their summaries in order.
+
+    Parameters
+    ----------
+    kind : 'poisson', 'stit' or 'mondrian'.
+    dim : 2 or 3.
+    param : ``lam`` for Poisson, ``stop_time`` for STIT and Mondrian.
+    n : number of replicates.
+    seed : root seed (int or ``SeedSequence``); replicate ``i`` uses the
+        ``i``-th spawned child sequence.
+    workers : number of worker processes; 1 runs in the calling process.
+    summary : picklable function mapping a sampled tessellation to the value
+        returned for that replicate.
+    bounds : optional sampling window (see ``Tessellation``).
+    """
+    if kind not in TESSELLATIONS:
+        raise ValueError(f"Unknown tessellation type {kind!r}; choose from {sorted(TESSELLATIONS)}.")
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    children = root.spawn(n)
+
+    if chunk_size is None:
+        chunk_size = max(1, min(64, n // (4 * max(workers, 1))))
+    tasks = [(param, children[i:i + chunk_size]) for i in range(0, n, chunk_size)]
+    init_args = (kind, dim, direction_matrix, summary, bounds)
+
+    if workers <= 1:
+        _init_worker(*init_args)
+        chunks = [_run_replicates(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init_args) as pool:
+            chunks = list(pool.map(_run_replicates, tasks))
+    return [result for chunk in chunks for result in chunk]
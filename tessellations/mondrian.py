@@ -1,9 +1,69 @@
-from collections import deque
 import numpy as np
-from shapely.geometry import box, LineString
-from shapely.ops import split
-import pyvista as pv
-from .base import Tessellation
+import shapely
+from .adjacency import Adjacency
+from .base import Tessellation, _check_bounds
+from .splittree import SplitTree
+
+
+def _split_bounds(bounds, dim):
+    """Split bounds in ``Tessellation.bounds`` layout into (lo, hi) arrays.
+
+    Works on a single bounds vector or on an (N, 2*dim) array of them.
+    2D layout is [minx, miny, maxx, maxy]; 3D layout is
+    [xmin, xmax, ymin, ymax, zmin, zmax].
+    """
+    b = np.asarray(bounds, dtype=float)
+    if dim == 2:
+        return b[..., :2], b[..., 2:]
+    return b[..., 0::2], b[..., 1::2]
+
+
+def _join_bounds(lo, hi, dim):
+    """Inverse of ``_split_bounds``."""
+    lo = np.asarray(lo, dtype=float)
+    hi = np.asarray(hi, dtype=float)
+    if dim == 2:
+        return np.concatenate([lo, hi], axis=-1)
+    out = np.empty(lo.shape[:-1] + (2 * dim,), dtype=float)
+    out[..., 0::2] = lo
+    out[..., 1::2] = hi
+    return out
+
+
+def _facet_measure(lo, hi, axis):
+    """Length or area of axis-aligned facets given as degenerate boxes normal to ``axis``."""
+    ext = hi - lo
+    ext[np.arange(ext.shape[0]), axis] = 1.0
+    return np.prod(ext, axis=1)
+
+
+def _follow_split(cells, slot, f_lo, f_hi, axis, cut, first_child):
+    """Re-attach facets whose cell was just split to the children that still touch them.
+
+    ``slot`` is the index among this round's splits of every facet's cell
+    (-1 if it was not split); split ``j`` cut at ``cut[j]`` along
+    ``axis[j]``, its lower child is ``first_child + j`` and its upper one
+    ``first_child + k + j``. Facets straddling the cut are clipped in place
+    and their upper parts appended; returns ``(rows, cells, f_lo, f_hi)``
+    where ``rows`` indexes the input facet each output facet came from.
+    """
+    k = cut.size
+    h = np.flatnonzero(slot >= 0)
+    j = slot[h]
+    a, c = axis[j], cut[j]
+    below = f_hi[h, a] <= c
+    above = ~below & (f_lo[h, a] >= c)
+    both = ~below & ~above
+    cells = cells.copy()
+    cells[h] = first_child + j + k * above
+
+    hb, ab, cb = h[both], a[both], c[both]
+    upper_lo, upper_hi = f_lo[hb], f_hi[hb]
+    upper_lo[np.arange(hb.size), ab] = cb
+    f_hi[hb, ab] = cb
+    rows = np.concatenate([np.arange(cells.size), hb])
+    cells = np.concatenate([cells, first_child + k + j[both]])
+    return rows, cells, np.concatenate([f_lo, upper_lo]), np.concatenate([f_hi, upper_hi])
 
 
 class MondrianTessellation(Tessellation):
@@ -13,121 +73,390 @@ class MondrianTessellation(Tessellation):
     The split rate for a cell is the sum of its side lengths; the split
     dimension is chosen with probability proportional to that side's length;
     the cut location is uniform along that side.
+
+    Cells are stored as an (N, 2*dim) array ``cell_bounds`` in the same
+    layout as ``self.bounds``, together with their ``birth_times``. Shapely
+    boxes (2D) or PyVista boxes (3D) are only built when ``cells`` is read.
+    With ``enable_split_tree()`` the cuts are kept as a ``split_tree`` for
+    batched point location. With ``enable_adjacency()`` the facets shared by
+    cells are also followed through every round to give the ``adjacency``
+    graph.
+
+    ``iter_events(stop_time)`` yields the cuts and final cells of every
+    round as it is drawn; cells are given as rows in ``cell_bounds`` layout.
     """
 
-    def __init__(self, dim, direction_matrix=None):
+    def __init__(self, dim, direction_matrix=None, rng=None, bounds=None):
         # Ignore any directional matrix; Mondrian splits are axis-aligned only
-        super().__init__(dim)
+        super().__init__(dim, rng=rng, bounds=bounds)
         if direction_matrix is not None:
             print("Note: Directional distribution is ignored for Mondrian process (axis-aligned only).")
 
+    # --- Lazily materialized geometry ---
+    @property
+    def cells(self):
+        if self._cells is None:
+            if self.dim == 2:
+                self._cells = list(shapely.box(*self.cell_bounds.T))
+            else:
+                import pyvista as pv
+                self._cells = [pv.Box(bounds=b) for b in self.cell_bounds]
+        return self._cells
+
+    @cells.setter
+    def cells(self, value):
+        self._cells = list(value)
+        self.cell_bounds = np.array([c.bounds for c in self._cells], dtype=float).reshape(-1, 2 * self.dim)
+        self.birth_times = np.zeros(len(self._cells), dtype=float)
+        self.split_tree = None
+        self.adjacency = None
+
+    @property
+    def hyperplanes(self):
+        return list(zip(self.hyperplane_points, self.hyperplane_normals))
+
+    @hyperplanes.setter
+    def hyperplanes(self, value):
+        value = list(value)
+        self.hyperplane_points = np.array([p for p, _ in value], dtype=float).reshape(-1, self.dim)
+        self.hyperplane_normals = np.array([n for _, n in value], dtype=float).reshape(-1, self.dim)
+        self.hyperplane_times = np.zeros(len(value), dtype=float)
+
     def sample(self, stop_time: float):
-        if self.dim == 2:
-            minx, miny, maxx, maxy = self.bounds
-            initial_cell = box(minx, miny, maxx, maxy)
+        for _ in self._run(stop_time):
+            pass
+        return self
+
+    def _run(self, stop_time, retain=True):
+        self.stop_time = stop_time
+        prof = self.profile
+        if prof is not None:
+            prof.reset()
+            prof.counters.update({"rounds": 0, "splits_attempted": 0, "queue_high_water": 0})
+        lo, hi = _split_bounds(self.bounds, self.dim)
+        lo = lo[None, :].copy()
+        hi = hi[None, :].copy()
+        birth = np.zeros(1, dtype=float)
+        track = self.track_adjacency and retain
+        keep_tree = self.track_split_tree and retain
+        keep_nodes = track or keep_tree
+        n_final = 0
+        no_cuts = (np.zeros(0), np.zeros((0, self.dim)), np.zeros((0, self.dim)))
+        node = np.zeros(1, dtype=np.int64)
+        n_nodes = 1
+
+        done_lo, done_hi, done_birth, done_node = [], [], [], []
+        cut_points, cut_axes, cut_times = [], [], []
+        cut_parent, cut_below, cut_above, cut_offsets = [], [], [], []
+        # Shared facets as degenerate boxes between two cells (node ids)
+        ea = eb = np.zeros(0, dtype=np.int64)
+        f_lo = f_hi = np.zeros((0, self.dim))
+        f_axis = np.zeros(0, dtype=np.int64)
+        done_facets = []
+
+        # Every active cell is advanced together: one round draws the
+        # lifetimes of the whole generation and splits those that die
+        # before stop_time, producing the next generation.
+        with self._phase("splitting"):
+            while birth.size:
+                if prof is not None:
+                    prof.count("rounds")
+                    prof.maximum("queue_high_water", birth.size)
+                lengths = np.maximum(hi - lo, 0.0)
+                rate = lengths.sum(axis=1)
+
+                death = np.full(birth.shape, np.inf)
+                alive = rate > 1e-12
+                death[alive] = birth[alive] + self.rng.exponential(1.0 / rate[alive])
+
+                splits = death <= stop_time
+                if track:
+                    # This round's cells have consecutive node ids from node[0] on
+                    base = node[0]
+                    slot = np.where(splits, np.cumsum(splits) - 1, -1)
+                final = (_join_bounds(lo[~splits], hi[~splits], self.dim), birth[~splits], death[~splits])
+                n_final += final[1].size
+                if retain:
+                    done_lo.append(lo[~splits])
+                    done_hi.append(hi[~splits])
+                    done_birth.append(birth[~splits])
+                if keep_nodes:
+                    done_node.append(node[~splits])
+                if not np.any(splits):
+                    if track:
+                        done_facets.append((ea, eb, _facet_measure(f_lo, f_hi, f_axis)))
+                    yield no_cuts, final
+                    break
+
+                lo, hi, node = lo[splits], hi[splits], node[splits]
+                lengths, rate, death = lengths[splits], rate[splits], death[splits]
+                k = death.size
+                if prof is not None:
+                    prof.count("splits_attempted", k)
+
+                # Split dimension proportional to side length
+                u = self.rng.uniform(size=k) * rate
+                axis = np.minimum((u[:, None] >= np.cumsum(lengths, axis=1)).sum(axis=1), self.dim - 1)
+                rows = np.arange(k)
+                cut = self.rng.uniform(lo[rows, axis], hi[rows, axis])
+
+                # Hyperplane through the cut, centred on the cell in the other axes
+                p = 0.5 * (lo + hi)
+                p[rows, axis] = cut
+                if retain:
+                    cut_points.append(p)
+                    cut_axes.append(axis)
+                    cut_times.append(death)
+                if keep_tree:
+                    # Left children get the next k node ids, right children the k after
+                    cut_parent.append(node)
+                    cut_below.append(n_nodes + rows)
+                    cut_above.append(n_nodes + k + rows)
+                    cut_offsets.append(cut)
+
+                if track:
+                    # Every cell of this round either splits or is final, so facets
+                    # between two cells that did not split are complete. The others
+                    # go to the children still touching them, and the two children
+                    # of every split share the cut.
+                    slot_a = np.where(ea >= base, slot[np.maximum(ea - base, 0)], -1)
+                    slot_b = np.where(eb >= base, slot[np.maximum(eb - base, 0)], -1)
+                    moved = (slot_a >= 0) | (slot_b >= 0)
+                    done_facets.append((ea[~moved], eb[~moved], _facet_measure(f_lo[~moved], f_hi[~moved], f_axis[~moved])))
+                    ea, eb, f_lo, f_hi, f_axis = ea[moved], eb[moved], f_lo[moved], f_hi[moved], f_axis[moved]
+                    slot_a, slot_b = slot_a[moved], slot_b[moved]
+                    rows_a, ea, f_lo, f_hi = _follow_split(ea, slot_a, f_lo, f_hi, axis, cut, n_nodes)
+                    eb, slot_b, f_axis = eb[rows_a], slot_b[rows_a], f_axis[rows_a]
+                    rows_b, eb, f_lo, f_hi = _follow_split(eb, slot_b, f_lo, f_hi, axis, cut, n_nodes)
+                    ea, f_axis = ea[rows_b], f_axis[rows_b]
+                    cut_lo, cut_hi = lo.copy(), hi.copy()
+                    cut_lo[rows, axis] = cut_hi[rows, axis] = cut
+                    ea = np.concatenate([ea, n_nodes + rows])
+                    eb = np.concatenate([eb, n_nodes + k + rows])
+                    f_lo, f_hi = np.concatenate([f_lo, cut_lo]), np.concatenate([f_hi, cut_hi])
+                    f_axis = np.concatenate([f_axis, axis])
+
+                left_hi = hi.copy()
+                left_hi[rows, axis] = cut
+                right_lo = lo.copy()
+                right_lo[rows, axis] = cut
+
+                lo = np.concatenate([lo, right_lo])
+                hi = np.concatenate([left_hi, hi])
+                yield (death, p, np.eye(self.dim)[axis]), final
+                birth = np.concatenate([death, death])
+                node = n_nodes + np.arange(2 * k)
+                n_nodes += 2 * k
+
+        if not retain:
+            self.cell_bounds = np.zeros((0, 2 * self.dim))
+            self.birth_times = np.zeros(0)
+            self._cells = None
+            self.split_tree = None
+            self.adjacency = None
+            self.hyperplanes = []
+            if prof is not None:
+                prof.counters["cells_emitted"] = n_final
+            return
+
+        self.cell_bounds = _join_bounds(np.concatenate(done_lo), np.concatenate(done_hi), self.dim)
+        self.birth_times = np.concatenate(done_birth)
+        self._cells = None
+        leaves = np.concatenate(done_node) if keep_nodes else None
+        if track:
+            cell_of = np.zeros(n_nodes, dtype=np.int64)
+            cell_of[leaves] = np.arange(leaves.size)
+            self.adjacency = Adjacency.from_pairs(
+                leaves.size, cell_of[np.concatenate([f[0] for f in done_facets])],
+                cell_of[np.concatenate([f[1] for f in done_facets])], np.concatenate([f[2] for f in done_facets]))
         else:
-            initial_cell = pv.Box(bounds=self.bounds)
+            self.adjacency = None
+        root_lo, root_hi = _split_bounds(self.bounds, self.dim)
+        if not keep_tree:
+            self.split_tree = None
+        elif cut_times:
+            self.split_tree = SplitTree.from_splits(
+                n_nodes, np.concatenate(cut_parent), np.concatenate(cut_below), np.concatenate(cut_above),
+                np.concatenate(cut_offsets), leaves, root_lo, root_hi,
+                axes=np.concatenate(cut_axes))
+        else:
+            self.split_tree = SplitTree.from_splits(1, [], [], [], [], [0], root_lo, root_hi, axes=[])
+        if cut_times:
+            times = np.concatenate(cut_times)
+            order = np.argsort(times, kind="stable")
+            axes = np.concatenate(cut_axes)[order]
+            self.hyperplane_points = np.concatenate(cut_points)[order]
+            self.hyperplane_normals = np.eye(self.dim)[axes]
+            self.hyperplane_times = times[order]
+        else:
+            self.hyperplanes = []
 
-        active_cells = deque([(initial_cell, 0.0)])
-        self.cells = []
-        self.hyperplanes = []
+        if prof is not None:
+            prof.counters["cells_emitted"] = len(self.cell_bounds)
 
-        while active_cells:
-            cell, birth_time = active_cells.popleft()
 
-            if self.dim == 2:
-                # Rectangle side lengths
-                cminx, cminy, cmaxx, cmaxy = cell.bounds
-                lengths = np.array([max(cmaxx - cminx, 0.0), max(cmaxy - cminy, 0.0)], dtype=float)
-            else:
-                # Box side lengths
-                b = cell.bounds  # [xmin, xmax, ymin, ymax, zmin, zmax]
-                lengths = np.array([
-                    max(b[1] - b[0], 0.0),
-                    max(b[3] - b[2], 0.0),
-                    max(b[5] - b[4], 0.0),
-                ], dtype=float)
-
-            rate = float(lengths.sum())
-            if rate <= 1e-12:
-                self.cells.append(cell)
-                continue
-
-            lifetime = np.random.exponential(1.0 / rate)
-            if birth_time + lifetime > stop_time:
-                self.cells.append(cell)
-                continue
-
-            current_time = birth_time + lifetime
-
-            # Choose split dimension proportional to side length
-            probs = lengths / rate
-            axis = int(np.random.choice(len(lengths), p=probs))
+# --- Lazy sampling over large domains ---
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_STREAM_TIME, _STREAM_AXIS, _STREAM_CUT, _STREAM_BELOW, _STREAM_ABOVE = (
+    np.uint64(s) for s in (0x1, 0x2, 0x3, 0x4, 0x5))
 
-            if self.dim == 2:
-                cminx, cminy, cmaxx, cmaxy = cell.bounds
-                if axis == 0:
-                    c = np.random.uniform(cminx, cmaxx)
-                    # Vertical line x = c
-                    line = LineString([(c, cminy - 1e3), (c, cmaxy + 1e3)])
-                    p = np.array([c, 0.5 * (cminy + cmaxy)])
-                    n = np.array([1.0, 0.0])
-                else:
-                    c = np.random.uniform(cminy, cmaxy)
-                    # Horizontal line y = c
-                    line = LineString([(cminx - 1e3, c), (cmaxx + 1e3, c)])
-                    p = np.array([0.5 * (cminx + cmaxx), c])
-                    n = np.array([0.0, 1.0])
-
-                self.hyperplanes.append((p, n))
-
-                try:
-                    parts = list(split(cell, line).geoms)
-                    if len(parts) < 2:
-                        # Degenerate split; keep cell
-                        self.cells.append(cell)
-                        continue
-                except Exception:
-                    self.cells.append(cell)
-                    continue
-
-                for new_cell in parts:
-                    active_cells.append((new_cell, current_time))
-
-            else:  # 3D
-                b = cell.bounds
-                if axis == 0:
-                    c = np.random.uniform(b[0], b[1])
-                    n = np.array([1.0, 0.0, 0.0])
-                    p = np.array([c, 0.5 * (b[2] + b[3]), 0.5 * (b[4] + b[5])])
-                elif axis == 1:
-                    c = np.random.uniform(b[2], b[3])
-                    n = np.array([0.0, 1.0, 0.0])
-                    p = np.array([0.5 * (b[0] + b[1]), c, 0.5 * (b[4] + b[5])])
-                else:
-                    c = np.random.uniform(b[4], b[5])
-                    n = np.array([0.0, 0.0, 1.0])
-                    p = np.array([0.5 * (b[0] + b[1]), 0.5 * (b[2] + b[3]), c])
-
-                self.hyperplanes.append((p, n))
-
-                try:
-                    c1 = cell.clip(normal=n, origin=p, invert=False)
-                    c2 = cell.clip(normal=n, origin=p, invert=True)
-                    parts = []
-                    if c1.n_points > 0 and c1.n_cells > 0:
-                        parts.append(c1)
-                    if c2.n_points > 0 and c2.n_cells > 0:
-                        parts.append(c2)
-                    if len(parts) < 2:
-                        self.cells.append(cell)
-                        continue
-                except Exception:
-                    self.cells.append(cell)
-                    continue
-
-                for new_cell in parts:
-                    active_cells.append((new_cell, current_time))
 
-        return self
+def _mix64(x):
+    """SplitMix64 finalizer: a bijective scramble of a uint64 array."""
+    z = x + _GOLDEN
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _uniforms(keys, stream):
+    """One uniform in [0, 1) per key, independent across streams."""
+    return (_mix64(keys ^ stream) >> np.uint64(11)).astype(float) * 2.0 ** -53
+
+
+class LazyMondrian:
+    """A Mondrian process on a large domain, sampled only where it is looked at.
+
+    The Mondrian process is consistent under restriction, so the cells of a
+    realization on ``bounds`` that meet a window, clipped to it, are a
+    Mondrian process on that window. ``view(stop_time, window)`` expands the
+    split tree only along nodes that meet the window and caches every node
+    it creates, so later views (overlapping, nested or at another time)
+    reuse that work and always agree with each other.
+
+    Every node draws its split from a hash of its own key rather than from
+    a shared random stream, so the realization does not depend on the order
+    of the queries. Memory grows with the number of cells seen, not with
+    the domain.
+
+        lazy = LazyMondrian(2, bounds=[0, 0, 1e6, 1e6], rng=0)
+        tess = lazy.view(5.0, window=[1000, 1000, 1010, 1010])
+        tess.visualize()
+    """
+
+    def __init__(self, dim, bounds=None, rng=None):
+        if dim not in [2, 3]:
+            raise ValueError("Dimension must be 2 or 3.")
+        self.dim = dim
+        self.seed = None if isinstance(rng, np.random.Generator) else rng
+        if bounds is None:
+            bounds = [0, 0, 1, 1] if dim == 2 else [0, 1, 0, 1, 0, 1]
+        self.bounds = _check_bounds(bounds, dim)
+        self._root_key = np.uint64(np.random.default_rng(rng).bit_generator.random_raw())
+        self.clear_cache()
+
+    def clear_cache(self):
+        """Drop all sampled nodes; later views give the same cells again."""
+        lo, hi = _split_bounds(self.bounds, self.dim)
+        self._n = 0
+        self._lo = np.zeros((0, self.dim))
+        self._hi = np.zeros((0, self.dim))
+        self._birth = np.zeros(0)
+        self._key = np.zeros(0, dtype=np.uint64)
+        self._time = np.zeros(0)
+        self._axis = np.zeros(0, dtype=np.int8)
+        self._cut = np.zeros(0)
+        self._child = np.zeros(0, dtype=np.int64)
+        self._add_nodes(lo[None, :], hi[None, :], np.zeros(1), np.array([self._root_key]))
+
+    @property
+    def n_cached(self):
+        """Number of split-tree nodes sampled so far."""
+        return self._n
+
+    def _add_nodes(self, lo, hi, birth, keys):
+        """Append nodes and draw their first split (time, axis, position)."""
+        n, k = self._n, birth.size
+        if n + k > self._birth.size:
+            cap = max(2 * self._birth.size, n + k, 64)
+            self._lo, self._hi = _grow(self._lo, cap), _grow(self._hi, cap)
+            self._birth, self._key, self._time = _grow(self._birth, cap), _grow(self._key, cap), _grow(self._time, cap)
+            self._axis, self._cut, self._child = _grow(self._axis, cap), _grow(self._cut, cap), _grow(self._child, cap)
+        lengths = hi - lo
+        rate = lengths.sum(axis=1)
+        rows = np.arange(k)
+        u = _uniforms(keys, _STREAM_AXIS) * rate
+        axis = np.minimum((u[:, None] >= np.cumsum(lengths, axis=1)).sum(axis=1), self.dim - 1)
+
+        sl = slice(n, n + k)
+        self._lo[sl], self._hi[sl], self._birth[sl], self._key[sl] = lo, hi, birth, keys
+        with np.errstate(divide="ignore"):
+            self._time[sl] = birth - np.log1p(-_uniforms(keys, _STREAM_TIME)) / rate
+        self._axis[sl] = axis
+        self._cut[sl] = lo[rows, axis] + _uniforms(keys, _STREAM_CUT) * lengths[rows, axis]
+        self._child[sl] = -1
+        self._n += k
+
+    def _expand(self, nodes):
+        """Create the two children of every node in ``nodes``."""
+        k = nodes.size
+        rows = np.arange(k)
+        axis, cut = self._axis[nodes], self._cut[nodes]
+        lo, hi = self._lo[nodes], self._hi[nodes]
+        below_hi = hi.copy()
+        below_hi[rows, axis] = cut
+        above_lo = lo.copy()
+        above_lo[rows, axis] = cut
+        keys = self._key[nodes]
+        # Children of node i are stored next to each other: below, then above
+        child_lo = np.stack([lo, above_lo], axis=1).reshape(-1, self.dim)
+        child_hi = np.stack([below_hi, hi], axis=1).reshape(-1, self.dim)
+        child_keys = np.stack([_mix64(keys ^ _STREAM_BELOW), _mix64(keys ^ _STREAM_ABOVE)], axis=1).reshape(-1)
+        first = self._n
+        self._add_nodes(child_lo, child_hi, np.repeat(self._time[nodes], 2), child_keys)
+        self._child[nodes] = first + 2 * rows
+
+    def view(self, stop_time, window=None):
+        """The realization at ``stop_time`` restricted to ``window`` (default: the whole domain).
+
+        Returns a ``MondrianTessellation`` on the window (clipped to the
+        domain), with its cells, birth times and the cuts visible in it.
+        """
+        window = self.bounds if window is None else _check_bounds(window, self.dim)
+        d_lo, d_hi = _split_bounds(self.bounds, self.dim)
+        w_lo, w_hi = _split_bounds(window, self.dim)
+        w_lo, w_hi = np.maximum(w_lo, d_lo), np.minimum(w_hi, d_hi)
+        if np.any(w_lo >= w_hi):
+            raise ValueError(f"Window {list(window)} does not overlap the domain {self.bounds}.")
+
+        leaves, cuts = [], []
+        frontier = np.zeros(1, dtype=np.int64)
+        while frontier.size:
+            overlap = np.minimum(self._hi[frontier], w_hi) - np.maximum(self._lo[frontier], w_lo)
+            frontier = frontier[np.all(overlap > 0, axis=1)]
+            split = self._time[frontier] <= stop_time
+            leaves.append(frontier[~split])
+            frontier = frontier[split]
+            new = frontier[self._child[frontier] < 0]
+            if new.size:
+                self._expand(new)
+            cuts.append(frontier)
+            frontier = np.concatenate([self._child[frontier], self._child[frontier] + 1])
+
+        leaves = np.concatenate(leaves)
+        tess = MondrianTessellation(self.dim, rng=self.seed, bounds=_join_bounds(w_lo, w_hi, self.dim))
+        tess.stop_time = stop_time
+        tess.cell_bounds = _join_bounds(np.maximum(self._lo[leaves], w_lo), np.minimum(self._hi[leaves], w_hi), self.dim)
+        tess.birth_times = self._birth[leaves]
+        tess._cells = None
+
+        # Cuts through the window, as in MondrianTessellation.sample
+        cuts = np.concatenate(cuts)
+        axis, cut = self._axis[cuts].astype(np.int64), self._cut[cuts]
+        inside = (cut > w_lo[axis]) & (cut < w_hi[axis])
+        cuts, axis, cut = cuts[inside], axis[inside], cut[inside]
+        rows = np.arange(cuts.size)
+        p = 0.5 * (np.maximum(self._lo[cuts], w_lo) + np.minimum(self._hi[cuts], w_hi))
+        p[rows, axis] = cut
+        order = np.argsort(self._time[cuts], kind="stable")
+        tess.hyperplane_points = p[order]
+        tess.hyperplane_normals = np.eye(self.dim)[axis[order]]
+        tess.hyperplane_times = self._time[cuts][order]
+        return tess
+
 
+def _grow(a, capacity):
+    """Copy of ``a`` with room for ``capacity`` rows."""
+    out = np.zeros((capacity,) + a.shape[1:], dtype=a.dtype)
+    out[:a.shape[0]] = a
+    return out
@@ -1,58 +1,386 @@
 # tessellations/poisson.py
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-from shapely.geometry import box, LineString
-from shapely.ops import split
-import pyvista as pv
+import shapely
+from .adjacency import Adjacency
+from .arrangement import Arrangement, _hash_weights
 from .base import Tessellation
+from .polytope import concat_packed, pack_polytopes, unpack_polytopes
 
 class PoissonTessellation(Tessellation):
-    """Generates a Poisson hyperplane tessellation."""
-    def sample(self, lam):
+    """Generates a Poisson hyperplane tessellation.
+
+    The cells are built in one pass from the sign vectors of the arrangement
+    vertices (see ``tessellations.arrangement``) rather than by splitting
+    every cell with every hyperplane in turn.
+
+    For large windows, ``sample(lam, tiles=k, workers=w)`` draws the
+    hyperplanes once, builds the arrangement of every tile of a k x k (x k)
+    grid in parallel and stitches cells that cross tile borders back
+    together, giving the same cells as the untiled run.
+
+    ``refine(delta_lam)`` and ``thin(p)`` move a sampled tessellation up or
+    down in intensity, updating the arrangement in place, so an intensity
+    sweep costs about as much as its largest run.
+
+    With ``enable_adjacency()``, untiled runs also read the ``adjacency``
+    graph off the arrangement's shared facets; tiled runs leave it None.
+
+    ``iter_events`` yields all hyperplanes first and then the cells. Tiled
+    runs stream the cells of each tile that do not touch a tile border as
+    soon as the tile is done; only the border pieces wait to be stitched.
+    """
+    def sample(self, lam, tiles=None, workers=1):
+        for _ in self._run(lam, tiles=tiles, workers=workers):
+            pass
+        return self
+
+    def _run(self, lam, tiles=None, workers=1, retain=True):
+        self.lam = lam
+        self._tiles, self._workers = tiles, workers
+        self._retained = retain
+        if self.profile is not None:
+            self.profile.reset()
+        lo, hi = self._window()
+        no_time = [None]
+
+        with self._phase("total"):
+            with self._phase("hyperplane_sampling"):
+                points, normals = self._draw_hyperplanes(lam, lo, hi)
+                self.hyperplanes = list(zip(points, normals)) if retain else []
+            offsets = np.einsum("ij,ij->i", normals, points)
+            yield (no_time * len(points), points, normals), ([], [], [])
+
+            emitted = []
+            if tiles is not None:
+                self.arrangement = None
+                self.adjacency = None
+                n_cells = 0
+                for block in self._iter_tiled(normals, offsets, lo, hi):
+                    n_cells += len(block)
+                    if retain:
+                        emitted.extend(block)
+                    yield ([], [], []), (block, no_time * len(block), no_time * len(block))
+                self.cells = emitted
+                self._count(len(points), n_cells)
+            else:
+                with self._phase("arrangement"):
+                    self.arrangement = Arrangement(normals, offsets, lo, hi)
+                self._read_cells()
+                self._count(len(points), len(self.cells))
+                yield ([], [], []), (self.cells, no_time * len(self.cells), no_time * len(self.cells))
+                if not retain:
+                    self.arrangement = self.adjacency = None
+                    self.cells = []
+
+    def refine(self, delta_lam):
+        """Raise the intensity by ``delta_lam`` by adding an independent Poisson process.
+
+        The union of independent Poisson hyperplane processes is a Poisson
+        process with the summed intensity, so the result has the law of
+        ``sample(lam + delta_lam)``. Only the extra hyperplanes are drawn;
+        the arrangement computes the vertices they create and the cells they
+        cross.
+        """
+        self._check_sampled("refining")
+        if delta_lam < 0:
+            raise ValueError(f"Cannot refine by a negative intensity ({delta_lam}); use thin() to go down.")
+        if self.profile is not None:
+            self.profile.reset()
+        lo, hi = self._window()
+
+        with self._phase("total"):
+            with self._phase("hyperplane_sampling"):
+                points, normals = self._draw_hyperplanes(delta_lam, lo, hi)
+                self.hyperplanes.extend(zip(points, normals))
+            self.lam += delta_lam
+            if self.arrangement is None:
+                self._sample_tiled(*self._hyperplane_arrays(), lo, hi)
+            else:
+                with self._phase("arrangement"):
+                    self.arrangement.add_hyperplanes(normals, np.einsum("ij,ij->i", normals, points))
+                self._read_cells()
+        self._count(len(self.hyperplanes), len(self.cells))
+        return self
+
+    def thin(self, p):
+        """Lower the intensity to ``p * lam`` by keeping every hyperplane with probability ``p``.
+
+        An independent p-thinning of a Poisson process is again a Poisson
+        process, so the result has the law of ``sample(p * lam)``. The cells
+        on either side of every removed hyperplane merge.
+        """
+        self._check_sampled("thinning")
+        if not 0 <= p <= 1:
+            raise ValueError(f"Retention probability must be in [0, 1]; got {p}.")
+        if self.profile is not None:
+            self.profile.reset()
+        lo, hi = self._window()
+
+        with self._phase("total"):
+            keep = self.rng.uniform(size=len(self.hyperplanes)) < p
+            self.hyperplanes = [h for h, k in zip(self.hyperplanes, keep) if k]
+            self.lam *= p
+            if self.arrangement is None:
+                self._sample_tiled(*self._hyperplane_arrays(), lo, hi)
+            else:
+                with self._phase("arrangement"):
+                    self.arrangement.remove_hyperplanes(keep)
+                self._read_cells()
+        self._count(len(self.hyperplanes), len(self.cells))
+        return self
+
+    def _check_sampled(self, action):
+        if not hasattr(self, "lam"):
+            raise RuntimeError(f"Run the .sample() method before {action}.")
+        if not self._retained:
+            raise RuntimeError(f"The last run streamed its cells without retaining them; "
+                               f"run the .sample() method again before {action}.")
+
+    def _window(self):
         if self.dim == 2:
             minx, miny, maxx, maxy = self.bounds
-            initial_cell = box(minx, miny, maxx, maxy)
-            metric = initial_cell.area
-        else:
-            initial_cell = pv.Box(bounds=self.bounds)
-            metric = initial_cell.volume
-        
-        self.cells = [initial_cell]
-        n_hyperplanes = np.random.poisson(lam * metric)
+            return np.array([minx, miny]), np.array([maxx, maxy])
+        return np.array(self.bounds[::2]), np.array(self.bounds[1::2])
 
-        if self.dim == 2:
-            points = np.random.uniform(
-                (self.bounds[0], self.bounds[1]),
-                (self.bounds[2], self.bounds[3]),
-                size=(n_hyperplanes, self.dim)
-            )
-        else:
-            points = np.random.uniform(self.bounds[::2], self.bounds[1::2], size=(n_hyperplanes, self.dim))
-        
-        if n_hyperplanes > 0:
-            normals = np.array([self._sample_direction() for _ in range(n_hyperplanes)], dtype=float)
-        else:
-            normals = np.zeros((0, self.dim), dtype=float)
-        self.hyperplanes = list(zip(points, normals))
-
-        for p, n in zip(points, normals):
-            new_cells = []
-            for cell in self.cells:
-                self._clip_and_add(cell, p, n, new_cells)
-            self.cells = new_cells
-        return self
+    def _draw_hyperplanes(self, lam, lo, hi):
+        """Points and unit normals of the hyperplanes of intensity ``lam`` hitting the window."""
+        n_hyperplanes = self.rng.poisson(lam * float(np.prod(hi - lo)))
+        points = self.rng.uniform(lo, hi, size=(n_hyperplanes, self.dim))
+        with self._phase("direction_sampling"):
+            normals = self.sample_directions(n_hyperplanes)
+        return points, normals
+
+    def _hyperplane_arrays(self):
+        points = np.array([p for p, _ in self.hyperplanes], dtype=float).reshape(-1, self.dim)
+        normals = np.array([n for _, n in self.hyperplanes], dtype=float).reshape(-1, self.dim)
+        return normals, np.einsum("ij,ij->i", normals, points)
+
+    def _sample_tiled(self, normals, offsets, lo, hi):
+        self.adjacency = None
+        self.cells = [cell for block in self._iter_tiled(normals, offsets, lo, hi) for cell in block]
+
+    def _iter_tiled(self, normals, offsets, lo, hi):
+        """Yield the cells of each tile that do not touch a tile border, then the stitched rest."""
+        edges = _tile_edges(lo, hi, self._tiles)
+        tol = _stitch_tol(edges)
+        border = []
+        with self._phase("tiles"):
+            for piece in _sample_tiles(normals, offsets, edges, self._workers):
+                inner, rest = _split_border_pieces(piece, edges, tol)
+                border.append(rest)
+                yield inner
+        with self._phase("stitching"):
+            yield _stitch(border, normals, offsets, edges, self.profile)
 
-    def _clip_and_add(self, cell, p, n, new_cells):
-        try:
+    def _read_cells(self):
+        """Cells and adjacency of ``self.arrangement``."""
+        with self._phase("cells"):
             if self.dim == 2:
-                # Construct a line whose direction is perpendicular to the normal n
-                t = np.array([-n[1], n[0]], dtype=float)
-                line = LineString([p - t * 1000, p + t * 1000])
-                split_result = list(split(cell, line).geoms)
-                new_cells.extend(split_result)
+                self.cells = self.arrangement.polygons()
             else:
-                c1 = cell.clip(normal=n, origin=p, invert=False)
-                c2 = cell.clip(normal=n, origin=p, invert=True)
-                if c1.n_points > 0: new_cells.append(c1)
-                if c2.n_points > 0: new_cells.append(c2)
-        except Exception:
-            new_cells.append(cell)
\ No newline at end of file
+                self.cells = unpack_polytopes(self.arrangement.packed())
+        self.adjacency = None
+        if self.track_adjacency:
+            with self._phase("adjacency"):
+                self.adjacency = Adjacency.from_pairs(self.arrangement.n_cells, *self.arrangement.adjacency())
+
+    def _count(self, n_hyperplanes, n_cells):
+        if self.profile is not None:
+            self.profile.counters["hyperplanes"] = n_hyperplanes
+            if self.arrangement is not None:
+                self.profile.counters["vertices"] = len(self.arrangement.vertices)
+            self.profile.counters["cells_emitted"] = n_cells
+
+
+# --- Tiled generation ---
+def _tile_edges(lo, hi, tiles):
+    """Grid lines of ``tiles`` tiles per axis (an int or one int per axis)."""
+    tiles = np.broadcast_to(np.asarray(tiles, dtype=int), lo.shape)
+    if np.any(tiles < 1):
+        raise ValueError(f"Need at least one tile per axis; got {tiles.tolist()}.")
+    edges = []
+    for a, b, k in zip(lo, hi, tiles):
+        e = np.linspace(a, b, k + 1)
+        e[0], e[-1] = a, b  # window faces must match exactly when stitching
+        edges.append(e)
+    return edges
+
+
+def _tile_boxes(edges):
+    """(lo, hi) of every tile of the grid."""
+    index = np.stack(np.meshgrid(*[np.arange(e.size - 1) for e in edges], indexing="ij"), axis=-1).reshape(-1, len(edges))
+    lo = np.column_stack([e[index[:, j]] for j, e in enumerate(edges)])
+    hi = np.column_stack([e[index[:, j] + 1] for j, e in enumerate(edges)])
+    return lo, hi
+
+
+def _tile_cells(task):
+    """Cells of the arrangement restricted to one tile (runs in a worker)."""
+    normals, offsets, lo, hi = task
+    arrangement = Arrangement(normals, offsets, lo, hi)
+    if lo.size == 2:
+        return {"vertices": arrangement.vertices[arrangement.cell_vertices], "vertex_ptr": arrangement.cell_ptr}
+    return arrangement.packed()
+
+
+def _sample_tiles(normals, offsets, edges, workers):
+    """Arrange the hyperplanes crossing each tile, one tile per task; yields the tiles in order."""
+    dim = len(edges)
+    tile_lo, tile_hi = _tile_boxes(edges)
+    corner_bits = np.array([[(i >> k) & 1 for k in range(dim)] for i in range(2 ** dim)])
+    tasks = []
+    for lo, hi in zip(tile_lo, tile_hi):
+        s = (lo + corner_bits * (hi - lo)) @ normals.T - offsets
+        crossing = (s.min(axis=0) < 0) & (s.max(axis=0) > 0)
+        tasks.append((normals[crossing], offsets[crossing], lo, hi))
+    if workers <= 1:
+        yield from map(_tile_cells, tasks)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from pool.map(_tile_cells, tasks)
+
+
+def _on_tile_border(points, edges, tol):
+    """Which points lie on an interior grid line/plane."""
+    hit = np.zeros(points.shape[0], dtype=bool)
+    for j, e in enumerate(edges):
+        inner = e[1:-1]
+        if inner.size:
+            hit |= np.abs(points[:, j:j + 1] - inner[None, :]).min(axis=1) <= tol
+    return hit
+
+
+def _stitch_tol(edges):
+    return 1e-9 * max(float(max(e[-1] - e[0] for e in edges)), 1.0)
+
+
+def _split_border_pieces(piece, edges, tol):
+    """Split a tile's pieces into finished cells and the piece buffers of those touching a tile border."""
+    if len(edges) == 2:
+        verts, ptr = piece["vertices"], piece["vertex_ptr"]
+        owner = np.repeat(np.arange(ptr.size - 1), np.diff(ptr))
+        touches = np.zeros(ptr.size - 1, dtype=bool)
+        touches[owner[_on_tile_border(verts, edges, tol)]] = True
+        rings = shapely.linearrings(verts, indices=owner) if verts.size else []
+        polygons = shapely.polygons(rings) if verts.size else np.zeros(0, dtype=object)
+        rest = touches[owner]
+        sizes = np.diff(ptr)[touches]
+        return list(polygons[~touches]), {"vertices": verts[rest], "vertex_ptr": np.concatenate([[0], np.cumsum(sizes)])}
+    cells = unpack_polytopes(piece)
+    touches = [bool(_on_tile_border(cell.vertices, edges, tol).any()) for cell in cells]
+    return ([cell for cell, t in zip(cells, touches) if not t],
+            pack_polytopes([cell for cell, t in zip(cells, touches) if t]))
+
+
+def _sign_keys(centres, normals, offsets):
+    """Hash of the sign vector of every point against all hyperplanes."""
+    weights = _hash_weights(normals.shape[0])
+    keys = np.zeros((centres.shape[0], weights.shape[1]))
+    chunk = max(1, (1 << 22) // max(normals.shape[0], 1))
+    for start in range(0, centres.shape[0], chunk):
+        sl = slice(start, start + chunk)
+        keys[sl] = ((centres[sl] @ normals.T - offsets) > 0).astype(float) @ weights
+    return keys
+
+
+def _stitch(pieces, normals, offsets, edges, profile=None):
+    """Merge per-tile pieces that belong to the same cell of the global arrangement.
+
+    Pieces touching an interior tile border are grouped by the sign vector of
+    an interior point against all hyperplanes; each group with more than one
+    piece is rebuilt as a single cell from its pieces' vertices and facets
+    that do not lie on a tile border.
+    """
+    dim = len(edges)
+    tol = _stitch_tol(edges)
+    if dim == 2:
+        verts = np.concatenate([p["vertices"] for p in pieces])
+        sizes = np.concatenate([np.diff(p["vertex_ptr"]) for p in pieces])
+        vertex_ptr = np.concatenate([[0], np.cumsum(sizes)])
+    else:
+        packed = concat_packed(pieces)
+        verts, vertex_ptr = packed["vertices"], packed["vertex_ptr"]
+    n_pieces = vertex_ptr.size - 1
+    piece_of = np.repeat(np.arange(n_pieces), np.diff(vertex_ptr))
+
+    border = _on_tile_border(verts, edges, tol)
+    candidates = np.unique(piece_of[border])
+    centres = np.add.reduceat(verts, vertex_ptr[:-1], axis=0) / np.diff(vertex_ptr)[:, None]
+    _, group, counts = np.unique(_sign_keys(centres[candidates], normals, offsets), axis=0,
+                                 return_inverse=True, return_counts=True)
+    group = group.reshape(-1)
+    merged = counts[group] > 1
+    # Renumber the groups that merge several pieces as 0..G-1
+    groups, group = np.unique(group[merged], return_inverse=True)
+    group_of_piece = np.full(n_pieces, -1)
+    group_of_piece[candidates[merged]] = group
+    keep = group_of_piece < 0
+    if profile is not None:
+        profile.counters["tiles"] = len(pieces)
+        profile.counters["merged_cells"] = int(groups.size)
+
+    # Vertices of a merged cell: those of its pieces not on a tile border,
+    # grouped by cell
+    sel = np.flatnonzero((group_of_piece[piece_of] >= 0) & ~border)
+    m_group = group_of_piece[piece_of[sel]]
+    order = np.argsort(m_group, kind="stable")
+    m_verts, m_group = verts[sel[order]], m_group[order]
+    m_ptr = np.concatenate([[0], np.cumsum(np.bincount(m_group, minlength=groups.size))])
+
+    if dim == 2:
+        centre = np.add.reduceat(m_verts, m_ptr[:-1], axis=0) / np.diff(m_ptr)[:, None] if groups.size else m_verts
+        rel = m_verts - centre[m_group]
+        m_verts = m_verts[np.lexsort((np.arctan2(rel[:, 1], rel[:, 0]), m_group))]
+        kept = np.flatnonzero(keep[piece_of])
+        coords = np.concatenate([verts[kept], m_verts])
+        index = np.concatenate([piece_of[kept], n_pieces + m_group])
+        rings = shapely.linearrings(coords, indices=np.unique(index, return_inverse=True)[1].reshape(-1))
+        return list(shapely.polygons(rings))
+
+    # 3D facets: the pieces' facet planes that are not tile borders, deduplicated
+    face_group = group_of_piece[np.repeat(np.arange(n_pieces), np.diff(packed["cell_face_ptr"]))]
+    face_normals, face_offsets = packed["normals"], packed["offsets"]
+    tile_face = np.zeros(face_group.size, dtype=bool)
+    for j, e in enumerate(edges):
+        axis_aligned = np.abs(face_normals[:, j]) == 1.0
+        for x in e[1:-1]:
+            tile_face |= axis_aligned & (np.abs(face_offsets * face_normals[:, j] - x) <= tol)
+    rows = np.flatnonzero((face_group >= 0) & ~tile_face)
+    planes = np.unique(np.column_stack([face_group[rows], face_normals[rows], face_offsets[rows]]), axis=0)
+    f_group = planes[:, 0].astype(np.int64)
+    f_normal, f_offset = planes[:, 1:4], planes[:, 4]
+
+    # Incidences between every facet and the vertices of its cell
+    n_per = np.diff(m_ptr)[f_group]
+    f_of = np.repeat(np.arange(f_group.size), n_per)
+    v_of = m_ptr[f_group][f_of] + np.arange(f_of.size) - np.repeat(np.cumsum(n_per) - n_per, n_per)
+    on = np.abs(np.einsum("ij,ij->i", m_verts[v_of], f_normal[f_of]) - f_offset[f_of]) <= tol
+    f_of, v_of = f_of[on], v_of[on]
+    counts = np.bincount(f_of, minlength=f_group.size)
+    valid = counts >= 3
+    keep_inc = valid[f_of]
+    f_of, v_of = np.cumsum(valid)[f_of[keep_inc]] - 1, v_of[keep_inc]
+    f_group, f_normal, f_offset, counts = f_group[valid], f_normal[valid], f_offset[valid], counts[valid]
+
+    # Counter-clockwise order around the outward normal
+    centre = np.zeros((f_group.size, 3))
+    np.add.at(centre, f_of, m_verts[v_of])
+    centre /= counts[:, None]
+    helper = np.where(np.abs(f_normal[:, :1]) < 0.9, np.array([[1.0, 0.0, 0.0]]), np.array([[0.0, 1.0, 0.0]]))
+    u = np.cross(f_normal, helper)
+    w = np.cross(f_normal, u)
+    rel = m_verts[v_of] - centre[f_of]
+    angle = np.arctan2(np.einsum("ij,ij->i", rel, w[f_of]), np.einsum("ij,ij->i", rel, u[f_of]))
+    v_of = v_of[np.lexsort((angle, f_of))]
+
+    merged_cells = unpack_polytopes({
+        "vertices": m_verts,
+        "vertex_ptr": m_ptr,
+        "face_ptr": np.concatenate([[0], np.cumsum(counts)]),
+        "face_vertices": v_of,
+        "cell_face_ptr": np.concatenate([[0], np.cumsum(np.bincount(f_group, minlength=groups.size))]),
+        "normals": f_normal,
+        "offsets": f_offset,
+    })
+    return [cell for cell, k in zip(unpack_polytopes(packed), keep) if k] + merged_cells
@@ -0,0 +1,367 @@
+# tessellations/polytope.py
+"""Lightweight convex polytope cells for 3D tessellations, and batched
+splitting of the shapely polygon cells used in 2D."""
+import numpy as np
+import shapely
+
+
+def _fan_triangles(face_ptr, face_vertices):
+    """Fan-triangulate polygon faces given in CSR layout.
+
+    Returns a (T, 3) array of vertex indices and the (T,) face index of
+    every triangle.
+    """
+    counts = np.diff(face_ptr)
+    n_tri = np.maximum(counts - 2, 0)
+    face_of = np.repeat(np.arange(counts.size), n_tri)
+    step = np.arange(int(n_tri.sum())) - np.repeat(np.cumsum(n_tri) - n_tri, n_tri)
+    start = face_ptr[:-1][face_of]
+    tris = np.column_stack([
+        face_vertices[start],
+        face_vertices[start + step + 1],
+        face_vertices[start + step + 2],
+    ])
+    return tris, face_of
+
+
+class ConvexPolytope:
+    """A convex polyhedron stored as plain NumPy arrays.
+
+    ``vertices`` is a (V, 3) array. Faces are stored in CSR layout: the
+    vertex indices of face ``f`` are ``face_vertices[face_ptr[f]:face_ptr[f + 1]]``,
+    ordered counter-clockwise when seen from outside. ``normals`` and
+    ``offsets`` hold the supporting half-space ``normals[f] . x <= offsets[f]``
+    of every face, so the polytope is the intersection of those half-spaces.
+
+    Only ``to_pyvista`` builds a VTK object, for rendering.
+    """
+
+    __slots__ = ("vertices", "face_ptr", "face_vertices", "normals", "offsets")
+
+    def __init__(self, vertices, face_ptr, face_vertices, normals, offsets):
+        self.vertices = np.asarray(vertices, dtype=float)
+        self.face_ptr = np.asarray(face_ptr, dtype=np.int64)
+        self.face_vertices = np.asarray(face_vertices, dtype=np.int64)
+        self.normals = np.asarray(normals, dtype=float)
+        self.offsets = np.asarray(offsets, dtype=float)
+
+    @classmethod
+    def from_faces(cls, vertices, faces, normals, offsets):
+        """Build from a list of per-face vertex index sequences."""
+        counts = [len(f) for f in faces]
+        face_ptr = np.concatenate([[0], np.cumsum(counts)])
+        face_vertices = np.concatenate([np.asarray(f, dtype=np.int64) for f in faces]) if faces else np.zeros(0, dtype=np.int64)
+        return cls(vertices, face_ptr, face_vertices, normals, offsets)
+
+    @classmethod
+    def from_bounds(cls, bounds):
+        """Axis-aligned box from bounds [xmin, xmax, ymin, ymax, zmin, zmax]."""
+        x0, x1, y0, y1, z0, z1 = bounds
+        vertices = np.array([
+            [x0, y0, z0], [x1, y0, z0], [x1, y1, z0], [x0, y1, z0],
+            [x0, y0, z1], [x1, y0, z1], [x1, y1, z1], [x0, y1, z1],
+        ], dtype=float)
+        faces = [
+            [0, 3, 2, 1],  # z = zmin
+            [4, 5, 6, 7],  # z = zmax
+            [0, 4, 7, 3],  # x = xmin
+            [1, 2, 6, 5],  # x = xmax
+            [0, 1, 5, 4],  # y = ymin
+            [3, 7, 6, 2],  # y = ymax
+        ]
+        normals = np.array([
+            [0, 0, -1], [0, 0, 1], [-1, 0, 0], [1, 0, 0], [0, -1, 0], [0, 1, 0],
+        ], dtype=float)
+        offsets = np.array([-z0, z1, -x0, x1, -y0, y1], dtype=float)
+        return cls.from_faces(vertices, faces, normals, offsets)
+
+    # --- Geometry ---
+    @property
+    def n_points(self):
+        return self.vertices.shape[0]
+
+    @property
+    def n_faces(self):
+        return self.face_ptr.size - 1
+
+    @property
+    def faces(self):
+        """List of per-face vertex index arrays."""
+        return np.split(self.face_vertices, self.face_ptr[1:-1])
+
+    @property
+    def bounds(self):
+        """Bounds in PyVista layout [xmin, xmax, ymin, ymax, zmin, zmax]."""
+        lo = self.vertices.min(axis=0)
+        hi = self.vertices.max(axis=0)
+        return [lo[0], hi[0], lo[1], hi[1], lo[2], hi[2]]
+
+    def _signed_tetra(self):
+        tris, _ = _fan_triangles(self.face_ptr, self.face_vertices)
+        c = self.vertices.mean(axis=0)
+        a, b, d = (self.vertices[tris[:, k]] - c for k in range(3))
+        return c, a, b, d, np.einsum("ij,ij->i", a, np.cross(b, d)) / 6.0
+
+    @property
+    def volume(self):
+        return float(self._signed_tetra()[-1].sum())
+
+    @property
+    def area(self):
+        """Surface area."""
+        tris, _ = _fan_triangles(self.face_ptr, self.face_vertices)
+        v = self.vertices
+        cross = np.cross(v[tris[:, 1]] - v[tris[:, 0]], v[tris[:, 2]] - v[tris[:, 0]])
+        return float(0.5 * np.linalg.norm(cross, axis=1).sum())
+
+    @property
+    def centroid(self):
+        c, a, b, d, vol = self._signed_tetra()
+        total = vol.sum()
+        if total <= 0:
+            return c
+        return c + (vol[:, None] * (a + b + d) / 4.0).sum(axis=0) / total
+
+    def mean_width(self):
+        """Mean width, ``sum_e length_e * exterior_angle_e / (4 pi)`` over the edges."""
+        ptr, fv = self.face_ptr, self.face_vertices
+        counts = np.diff(ptr)
+        face_of = np.repeat(np.arange(counts.size), counts)
+        nxt = np.arange(fv.size) + 1
+        nxt[ptr[1:] - 1] = ptr[:-1]
+        a, b = fv, fv[nxt]
+
+        # Each edge is traversed once in each direction by its two faces
+        key = np.minimum(a, b) * self.n_points + np.maximum(a, b)
+        order = np.argsort(key, kind="stable")
+        key, a, b, face_of = key[order], a[order], b[order], face_of[order]
+        pair = np.flatnonzero(key[1:] == key[:-1])
+        f1, f2 = face_of[pair], face_of[pair + 1]
+
+        cos = np.clip(np.einsum("ij,ij->i", self.normals[f1], self.normals[f2]), -1.0, 1.0)
+        length = np.linalg.norm(self.vertices[a[pair]] - self.vertices[b[pair]], axis=1)
+        return float((length * np.arccos(cos)).sum() / (4.0 * np.pi))
+
+    # --- Splitting ---
+    def split(self, p, n, eps=1e-12):
+        """Split by the plane through ``p`` with normal ``n``.
+
+        Returns ``(below, above)`` where ``below`` is the part with
+        ``n . (x - p) <= 0``, or ``None`` if the plane does not cross the
+        interior.
+        """
+        n = np.asarray(n, dtype=float)
+        d = float(n @ np.asarray(p, dtype=float))
+        s = self.vertices @ n - d
+        tol = eps * (1.0 + np.abs(s).max())
+        side = np.where(s > tol, 1, np.where(s < -tol, -1, 0))
+        if not (np.any(side < 0) and np.any(side > 0)):
+            return None
+
+        new_points = []
+        edge_point = {}
+        n_old = self.vertices.shape[0]
+        below_faces, above_faces = [], []
+        below_planes, above_planes = [], []
+        cap = {int(i) for i in np.flatnonzero(side == 0)}
+
+        ptr, fv = self.face_ptr, self.face_vertices
+        for f in range(ptr.size - 1):
+            idx = fv[ptr[f]:ptr[f + 1]]
+            sf = side[idx]
+            if np.all(sf <= 0):
+                below_faces.append(idx)
+                below_planes.append(f)
+                continue
+            if np.all(sf >= 0):
+                above_faces.append(idx)
+                above_planes.append(f)
+                continue
+            lo_poly, hi_poly = [], []
+            for a, b in zip(idx, np.roll(idx, -1)):
+                sa, sb = side[a], side[b]
+                if sa <= 0:
+                    lo_poly.append(a)
+                if sa >= 0:
+                    hi_poly.append(a)
+                if sa * sb < 0:
+                    key = (a, b) if a < b else (b, a)
+                    m = edge_point.get(key)
+                    if m is None:
+                        t = s[a] / (s[a] - s[b])
+                        new_points.append(self.vertices[a] + t * (self.vertices[b] - self.vertices[a]))
+                        m = n_old + len(new_points) - 1
+                        edge_point[key] = m
+                        cap.add(m)
+                    lo_poly.append(m)
+                    hi_poly.append(m)
+            if len(lo_poly) >= 3:
+                below_faces.append(np.array(lo_poly))
+                below_planes.append(f)
+            if len(hi_poly) >= 3:
+                above_faces.append(np.array(hi_poly))
+                above_planes.append(f)
+
+        verts = np.vstack([self.vertices, new_points]) if new_points else self.vertices
+        cap = np.fromiter(cap, dtype=np.int64)
+        if cap.size < 3:
+            return None
+
+        # Order the cap counter-clockwise around +n (outward for ``below``)
+        rel = verts[cap] - verts[cap].mean(axis=0)
+        helper = np.array([1.0, 0.0, 0.0]) if abs(n[0]) < 0.9 else np.array([0.0, 1.0, 0.0])
+        u = np.cross(n, helper)
+        w = np.cross(n, u)
+        cap = cap[np.argsort(np.arctan2(rel @ w, rel @ u))]
+
+        below = self._assemble(verts, below_faces + [cap], below_planes, n, d)
+        above = self._assemble(verts, above_faces + [cap[::-1]], above_planes, -n, -d)
+        return below, above
+
+    def _assemble(self, verts, faces, planes, cap_normal, cap_offset):
+        flat = np.concatenate(faces)
+        ids, local = np.unique(flat, return_inverse=True)
+        face_ptr = np.concatenate([[0], np.cumsum([f.size for f in faces])])
+        normals = np.vstack([self.normals[planes], cap_normal])
+        offsets = np.concatenate([self.offsets[planes], [cap_offset]])
+        return ConvexPolytope(verts[ids], face_ptr, local.reshape(-1), normals, offsets)
+
+    def to_pyvista(self):
+        """Convert to a ``pyvista.PolyData`` surface for rendering."""
+        import pyvista as pv
+
+        counts = np.diff(self.face_ptr)
+        cells = np.insert(self.face_vertices, self.face_ptr[:-1], counts)
+        return pv.PolyData(self.vertices, cells)
+
+    def __repr__(self):
+        return f"ConvexPolytope(n_points={self.n_points}, n_faces={self.n_faces}, volume={self.volume:.6g})"
+
+
+def pack_polytopes(cells):
+    """Concatenate ConvexPolytope cells into flat, contiguous buffers.
+
+    Returns a dict with ``vertices`` (V, 3), ``vertex_ptr`` (N + 1,),
+    ``face_ptr`` (F + 1,), ``face_vertices`` (indices into ``vertices``),
+    ``cell_face_ptr`` (N + 1,), ``normals`` (F, 3) and ``offsets`` (F,).
+    Cell ``i`` owns vertices ``vertex_ptr[i]:vertex_ptr[i + 1]`` and faces
+    ``cell_face_ptr[i]:cell_face_ptr[i + 1]``.
+    """
+    n_vertices = np.array([c.vertices.shape[0] for c in cells], dtype=np.int64)
+    n_faces = np.array([c.face_ptr.size - 1 for c in cells], dtype=np.int64)
+    n_corners = np.array([c.face_vertices.size for c in cells], dtype=np.int64)
+    vertex_ptr = np.concatenate([[0], np.cumsum(n_vertices)])
+    cell_face_ptr = np.concatenate([[0], np.cumsum(n_faces)])
+
+    if not cells:
+        return {
+            "vertices": np.zeros((0, 3)), "vertex_ptr": vertex_ptr, "face_ptr": np.zeros(1, dtype=np.int64),
+            "face_vertices": np.zeros(0, dtype=np.int64), "cell_face_ptr": cell_face_ptr,
+            "normals": np.zeros((0, 3)), "offsets": np.zeros(0),
+        }
+
+    face_sizes = np.concatenate([np.diff(c.face_ptr) for c in cells])
+    face_vertices = np.concatenate([c.face_vertices for c in cells])
+    face_vertices += np.repeat(vertex_ptr[:-1], n_corners)
+    return {
+        "vertices": np.concatenate([c.vertices for c in cells]),
+        "vertex_ptr": vertex_ptr,
+        "face_ptr": np.concatenate([[0], np.cumsum(face_sizes)]),
+        "face_vertices": face_vertices,
+        "cell_face_ptr": cell_face_ptr,
+        "normals": np.concatenate([c.normals for c in cells]),
+        "offsets": np.concatenate([c.offsets for c in cells]),
+    }
+
+
+def unpack_polytopes(packed):
+    """Inverse of ``pack_polytopes``: a list of ConvexPolytope cells."""
+    vertex_ptr, face_ptr = np.asarray(packed["vertex_ptr"]), np.asarray(packed["face_ptr"])
+    cell_face_ptr = np.asarray(packed["cell_face_ptr"])
+    vertices, face_vertices = packed["vertices"], packed["face_vertices"]
+    normals, offsets = packed["normals"], packed["offsets"]
+    cells = []
+    for i in range(vertex_ptr.size - 1):
+        f0, f1 = cell_face_ptr[i], cell_face_ptr[i + 1]
+        v0 = vertex_ptr[i]
+        cells.append(ConvexPolytope(
+            vertices[v0:vertex_ptr[i + 1]],
+            face_ptr[f0:f1 + 1] - face_ptr[f0],
+            face_vertices[face_ptr[f0]:face_ptr[f1]] - v0,
+            normals[f0:f1],
+            offsets[f0:f1],
+        ))
+    return cells
+
+
+def concat_packed(parts):
+    """Concatenate several ``pack_polytopes`` dicts into one."""
+    parts = list(parts)
+    n_vertices = np.cumsum([0] + [p["vertices"].shape[0] for p in parts])
+    n_corners = np.cumsum([0] + [p["face_vertices"].size for p in parts])
+    n_faces = np.cumsum([0] + [p["normals"].shape[0] for p in parts])
+    return {
+        "vertices": np.concatenate([p["vertices"] for p in parts]).reshape(-1, 3),
+        "vertex_ptr": np.concatenate([[0]] + [p["vertex_ptr"][1:] + n_vertices[i] for i, p in enumerate(parts)]),
+        "face_ptr": np.concatenate([[0]] + [p["face_ptr"][1:] + n_corners[i] for i, p in enumerate(parts)]),
+        "face_vertices": np.concatenate([p["face_vertices"] + n_vertices[i] for i, p in enumerate(parts)]).astype(np.int64),
+        "cell_face_ptr": np.concatenate([[0]] + [p["cell_face_ptr"][1:] + n_faces[i] for i, p in enumerate(parts)]),
+        "normals": np.concatenate([p["normals"] for p in parts]).reshape(-1, 3),
+        "offsets": np.concatenate([p["offsets"] for p in parts]),
+    }
+
+
+# --- 2D cells ---
+def polygon_vertices(polygons):
+    """Vertices of shapely polygons as one (V, 2) array and a (N + 1,) ``vertex_ptr``."""
+    rings = shapely.get_exterior_ring(np.asarray(polygons, dtype=object))
+    coords = shapely.get_coordinates(rings)
+    counts = shapely.get_num_coordinates(rings)
+    closing = np.cumsum(counts) - 1  # every ring repeats its first vertex
+    keep = np.ones(coords.shape[0], dtype=bool)
+    keep[closing[counts > 0]] = False
+    return coords[keep], np.concatenate([[0], np.cumsum(np.maximum(counts - 1, 0))])
+
+
+def split_polygons(polygons, points, normals):
+    """Split convex polygons, each by its own line through ``points[i]`` with normal ``normals[i]``.
+
+    Polygons whose bounding box lies on one side of their line are skipped;
+    the others are clipped in two vectorized GEOS calls against half-plane
+    quadrilaterals sized to each polygon. Returns object arrays ``below``
+    (``n . x <= n . p``) and ``above``; both are None where the line misses
+    the polygon or leaves nothing of positive area on one side.
+    """
+    polygons = np.asarray(polygons, dtype=object).reshape(-1)
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    normals = np.asarray(normals, dtype=float).reshape(-1, 2)
+    below = np.full(polygons.size, None, dtype=object)
+    above = np.full(polygons.size, None, dtype=object)
+
+    minx, miny, maxx, maxy = shapely.bounds(polygons).T
+    offsets = np.einsum("ij,ij->i", points, normals)
+    corners = np.column_stack([
+        normals[:, 0] * x + normals[:, 1] * y for x in (minx, maxx) for y in (miny, maxy)
+    ]) - offsets[:, None]
+    hit = np.flatnonzero((corners.min(axis=1) < 0) & (corners.max(axis=1) > 0))
+    if hit.size == 0:
+        return below, above
+
+    n = normals[hit]
+    t = np.column_stack([-n[:, 1], n[:, 0]])
+    centre = np.column_stack([minx + maxx, miny + maxy])[hit] / 2
+    # The box centre projected onto the line, and a reach covering the whole box
+    p = centre + (offsets[hit] - np.einsum("ij,ij->i", centre, n))[:, None] * n
+    r = 2.0 * np.hypot(maxx - minx, maxy - miny)[hit, None]
+    a, b = p - r * t, p + r * t
+    lower = shapely.polygons(np.stack([a, b, b - r * n, a - r * n], axis=1))
+    upper = shapely.polygons(np.stack([a, b, b + r * n, a + r * n], axis=1))
+    parts_below = shapely.intersection(polygons[hit], lower)
+    parts_above = shapely.intersection(polygons[hit], upper)
+
+    polygon = shapely.GeometryType.POLYGON
+    ok = ((shapely.get_type_id(parts_below) == polygon) & (shapely.get_type_id(parts_above) == polygon)
+          & (shapely.area(parts_below) > 0) & (shapely.area(parts_above) > 0))
+    below[hit[ok]] = parts_below[ok]
+    above[hit[ok]] = parts_above[ok]
+    return below, above
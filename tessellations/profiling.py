@@ -0,0 +1,92 @@
+# tessellations/profiling.py
+"""Phase timers and event counters for ``sample()``.
+
+Profiling is off by default. ``tess.enable_profiling()`` attaches a
+``Profile`` that the samplers fill in; while it is off every hook is a
+single ``None`` check.
+
+    tess = STITTessellation(2, rng=0).enable_profiling()
+    tess.sample(20)
+    print(tess.profile.format())
+"""
+import time
+
+
+class _Phase:
+    """Context manager adding the time spent inside it to one phase."""
+
+    __slots__ = ("profile", "name", "start")
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profile.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NoPhase:
+    """Shared do-nothing stand-in for ``_Phase`` when profiling is off."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+NO_PHASE = _NoPhase()
+
+
+class Profile:
+    """Accumulated phase timings (seconds and calls) and counters of a run."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.timings = {}
+        self.calls = {}
+        self.counters = {}
+
+    def phase(self, name):
+        """Time a block: ``with profile.phase("splitting"): ...``."""
+        return _Phase(self, name)
+
+    def add_time(self, name, seconds):
+        self.timings[name] = self.timings.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    def count(self, name, k=1):
+        self.counters[name] = self.counters.get(name, 0) + k
+
+    def maximum(self, name, value):
+        """Keep the largest value seen, e.g. a queue high-water mark."""
+        if value > self.counters.get(name, 0):
+            self.counters[name] = value
+
+    def report(self):
+        """Structured copy of the timings and counters."""
+        return {
+            "timings": {name: {"seconds": t, "calls": self.calls[name]} for name, t in self.timings.items()},
+            "counters": dict(self.counters),
+        }
+
+    def format(self):
+        """Human-readable table of the report."""
+        lines = ["phase                      seconds      calls"]
+        for name, t in sorted(self.timings.items(), key=lambda item: -item[1]):
+            lines.append(f"{name:<22} {t:>11.6f} {self.calls[name]:>10d}")
+        if self.counters:
+            lines.append("")
+            lines.append("counter                      value")
+            for name, value in self.counters.items():
+                lines.append(f"{name:<26} {value:>8}")
+        return "\n".join(lines)
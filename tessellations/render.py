@@ -0,0 +1,284 @@
+# tessellations/render.py
+"""Batched rendering of tessellations.
+
+2D cells are drawn as a single matplotlib ``PolyCollection``; in 3D, the
+slices of the window by all hyperplanes are computed in one vectorized pass
+and merged into one ``PolyData`` (one actor for the fills, one for the
+outlines). Passing ``filename`` renders off screen straight to an image
+file, without needing a display.
+
+``animate`` adds the hyperplanes one frame at a time from geometry that is
+precomputed in a single pass, and either plays the frames on a timer or
+writes them to a video/GIF at a fixed frame rate.
+"""
+import importlib.util
+import numpy as np
+import shapely
+
+# Box corners as (x, y, z) bit patterns and the 12 edges between them
+_CORNER_BITS = np.array([[(i >> k) & 1 for k in range(3)] for i in range(8)])
+_BOX_EDGES = np.array([(a, b) for a in range(8) for b in range(a + 1, 8)
+                       if np.abs(_CORNER_BITS[a] - _CORNER_BITS[b]).sum() == 1])
+
+
+def cell_polygons(tess):
+    """Vertices of every 2D cell, as a list of (k, 2) arrays or an (N, 4, 2) array for boxes."""
+    if hasattr(tess, "cell_bounds"):
+        b = np.asarray(tess.cell_bounds)
+        x0, y0, x1, y1 = b.T
+        return np.stack([np.column_stack(c) for c in ((x0, y0), (x1, y0), (x1, y1), (x0, y1))], axis=1)
+    packed = getattr(tess, "packed", None)
+    if packed is not None:
+        return np.split(np.asarray(packed["vertices"]), np.asarray(packed["cell_ptr"])[1:-1])
+    rings = shapely.get_exterior_ring(np.asarray(tess.cells, dtype=object))
+    coords = shapely.get_coordinates(rings)
+    return np.split(coords, np.cumsum(shapely.get_num_coordinates(rings))[:-1])
+
+
+def line_segments(points, normals, bounds):
+    """Clip many 2D lines to the window [minx, miny, maxx, maxy] at once.
+
+    The line ``i`` passes through ``points[i]`` with normal ``normals[i]``.
+    Returns ``(segments, hit)``: an (H, 2, 2) array of end points and a
+    boolean mask of the lines that cross the window.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    normals = np.asarray(normals, dtype=float).reshape(-1, 2)
+    t = np.column_stack([-normals[:, 1], normals[:, 0]])
+    lo = np.asarray(bounds[:2], dtype=float)
+    hi = np.asarray(bounds[2:], dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s_lo, s_hi = (lo - points) / t, (hi - points) / t
+    # Lines parallel to an axis are unbounded along it when inside the slab
+    inside = (points >= lo) & (points <= hi)
+    flat = t == 0
+    s0 = np.where(flat, np.where(inside, -np.inf, np.inf), np.minimum(s_lo, s_hi)).max(axis=1)
+    s1 = np.where(flat, np.where(inside, np.inf, -np.inf), np.maximum(s_lo, s_hi)).min(axis=1)
+    hit = s0 < s1
+    s0, s1 = np.where(hit, s0, 0.0), np.where(hit, s1, 0.0)
+    segments = np.stack([points + s0[:, None] * t, points + s1[:, None] * t], axis=1)
+    return segments, hit
+
+
+def box_corners(bounds):
+    """Corners of a box given in PyVista layout [xmin, xmax, ymin, ymax, zmin, zmax]."""
+    b = np.asarray(bounds, dtype=float)
+    lo, hi = b[0::2], b[1::2]
+    return lo + _CORNER_BITS * (hi - lo)
+
+
+def slice_box(points, normals, bounds):
+    """Intersect a box with many planes at once.
+
+    Returns ``(vertices, ptr, plane)``: the slice polygon of plane
+    ``plane[i]`` has vertices ``vertices[ptr[i]:ptr[i + 1]]`` in cyclic
+    order. Planes that miss the box are skipped.
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 3)
+    normals = np.asarray(normals, dtype=float).reshape(-1, 3)
+    corners = box_corners(bounds)
+    s = corners @ normals.T - np.einsum("ij,ij->i", points, normals)  # (8, H)
+    sa, sb = s[_BOX_EDGES[:, 0]].T, s[_BOX_EDGES[:, 1]].T  # (H, 12)
+    crossing = sa * sb < 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = np.where(crossing, sa / (sa - sb), 0.0)
+    a, b = corners[_BOX_EDGES[:, 0]], corners[_BOX_EDGES[:, 1]]
+    pts = a[None] + t[..., None] * (b - a)[None]  # (H, 12, 3)
+
+    counts = crossing.sum(axis=1)
+    centre = (pts * crossing[..., None]).sum(axis=1) / np.maximum(counts, 1)[:, None]
+    helper = np.where(np.abs(normals[:, :1]) < 0.9, [[1.0, 0.0, 0.0]], [[0.0, 1.0, 0.0]])
+    u = np.cross(normals, helper)
+    w = np.cross(normals, u)
+    rel = pts - centre[:, None, :]
+    angle = np.arctan2(np.einsum("hij,hj->hi", rel, w), np.einsum("hij,hj->hi", rel, u))
+    angle[~crossing] = np.inf
+    order = np.argsort(angle, axis=1)
+
+    keep = counts >= 3
+    pts = np.take_along_axis(pts, order[..., None], axis=1)[keep]
+    valid = np.take_along_axis(crossing, order, axis=1)[keep]
+    counts = counts[keep]
+    return pts[valid], np.concatenate([[0], np.cumsum(counts)]), np.flatnonzero(keep)
+
+
+def _hyperplane_arrays(tess):
+    points = np.array([p for p, _ in tess.hyperplanes], dtype=float).reshape(-1, tess.dim)
+    normals = np.array([n for _, n in tess.hyperplanes], dtype=float).reshape(-1, tess.dim)
+    return points, normals
+
+
+def _slice_cells(tess):
+    """Vertices, VTK face and line arrays of all slices, and the slice planes."""
+    verts, ptr, plane = slice_box(*_hyperplane_arrays(tess), tess.bounds)
+    counts = np.diff(ptr)
+    ids = np.arange(verts.shape[0])
+    faces = np.insert(ids, ptr[:-1], counts)
+    # Closed polylines repeat their first vertex
+    closed = np.insert(ids, ptr[1:], ptr[:-1])
+    lines = np.insert(closed, ptr[:-1] + np.arange(counts.size), counts + 1)
+    return verts, faces, lines, ptr, plane
+
+
+def _slice_mesh(tess):
+    """Merged fill and outline meshes of all hyperplane slices of the window."""
+    import pyvista as pv
+
+    verts, faces, lines, _, _ = _slice_cells(tess)
+    return pv.PolyData(verts, faces=faces), pv.PolyData(verts, lines=lines)
+
+
+def _setup_plotter(bounds, off_screen, window_size=(1024, 1024)):
+    import pyvista as pv
+
+    plotter = pv.Plotter(window_size=list(window_size), off_screen=off_screen)
+    plotter.set_background('white')
+    plotter.add_mesh(pv.Box(bounds=bounds), style='wireframe', color='black', line_width=2)
+    plotter.enable_lightkit()
+    plotter.camera_position = 'iso'
+    plotter.enable_parallel_projection()
+    return plotter
+
+
+def _figure(bounds, off_screen):
+    if off_screen:
+        from matplotlib.figure import Figure
+        fig = Figure()
+        ax = fig.add_subplot()
+    else:
+        import matplotlib.pyplot as plt
+        fig, ax = plt.subplots()
+    minx, miny, maxx, maxy = bounds
+    ax.set_xlim(minx, maxx)
+    ax.set_ylim(miny, maxy)
+    ax.set_aspect('equal', 'box')
+    ax.axis('off')
+    return fig, ax
+
+
+def render_2d(tess, filename=None, dpi=150):
+    """Draw the cells as one PolyCollection; save to ``filename`` or show."""
+    from matplotlib.collections import PolyCollection
+
+    polygons = cell_polygons(tess)
+    fig, ax = _figure(tess.bounds, off_screen=filename is not None)
+    ax.add_collection(PolyCollection(polygons, facecolors='w', edgecolors='k', linewidths=0.7))
+
+    if filename is None:
+        import matplotlib.pyplot as plt
+        plt.show()
+    else:
+        fig.savefig(filename, dpi=dpi, bbox_inches='tight')
+    return fig
+
+
+def render_3d(tess, filename=None, window_size=(1024, 1024)):
+    """Draw all hyperplane slices as a single mesh; save to ``filename`` or show."""
+    plotter = _setup_plotter(tess.bounds, off_screen=filename is not None, window_size=window_size)
+    fills, outlines = _slice_mesh(tess)
+    if fills.n_points > 0:
+        plotter.add_mesh(fills, color='darkgrey', show_edges=False)
+        plotter.add_mesh(outlines, color='k', line_width=1)
+
+    if filename is None:
+        plotter.show()
+    else:
+        plotter.screenshot(filename)
+        plotter.close()
+    return plotter
+
+
+def animate(tess, filename=None, fps=2, dpi=100):
+    """Add the hyperplanes one per frame, in the order they were generated.
+
+    With ``filename`` the frames are rendered off screen and written at
+    ``fps`` frames per second: ``.gif`` files through Pillow (2D) or
+    imageio (3D), anything else as a video through ffmpeg. Without it the
+    animation plays in a window, one frame every ``1 / fps`` seconds.
+    """
+    if tess.dim == 2:
+        return _animate_2d(tess, filename, fps, dpi)
+    return _animate_3d(tess, filename, fps)
+
+
+def _animate_2d(tess, filename, fps, dpi):
+    from matplotlib import animation
+    from matplotlib.collections import LineCollection
+    from matplotlib.patches import Rectangle
+
+    segments, hit = line_segments(*_hyperplane_arrays(tess), tess.bounds)
+    shown = np.cumsum(hit)  # segments visible after each frame
+    segments = segments[hit]
+
+    fig, ax = _figure(tess.bounds, off_screen=filename is not None)
+    minx, miny, maxx, maxy = tess.bounds
+    ax.add_patch(Rectangle((minx, miny), maxx - minx, maxy - miny, fill=False, edgecolor='black', linewidth=2))
+    lines = ax.add_collection(LineCollection([], colors='k', linewidths=1, animated=True))
+
+    def draw_frame(k):
+        lines.set_segments(segments[:shown[k]])
+        return (lines,)
+
+    anim = animation.FuncAnimation(fig, draw_frame, frames=shown.size, interval=1000.0 / fps,
+                                   blit=True, repeat=False)
+    if filename is None:
+        import matplotlib.pyplot as plt
+        plt.show()
+    else:
+        if str(filename).lower().endswith('.gif'):
+            writer = animation.PillowWriter(fps=fps)
+        else:
+            writer = animation.FFMpegWriter(fps=fps)
+        anim.save(filename, writer=writer, dpi=dpi)
+    return anim
+
+
+def _check_movie_writer(filename):
+    """Fail before any slicing if pyvista lacks the optional package needed to write ``filename``."""
+    package, module = ('imageio', 'imageio') if str(filename).lower().endswith('.gif') \
+        else ('imageio-ffmpeg', 'imageio_ffmpeg')
+    if importlib.util.find_spec(module) is None:
+        raise ImportError(f"Writing a 3D animation to {filename} needs the optional '{package}' package "
+                          f"(pip install {package}).")
+
+
+def _animate_3d(tess, filename, fps):
+    if filename is not None:
+        _check_movie_writer(filename)
+    import pyvista as pv
+
+    verts, faces, lines, ptr, plane = _slice_cells(tess)
+    # Slices visible after each frame, and where their cells end in the
+    # VTK arrays (each face has a size prefix; each outline also repeats a vertex)
+    shown = np.searchsorted(plane, np.arange(len(tess.hyperplanes)), side='right')
+    face_end = np.concatenate([[0], ptr[1:] + np.arange(1, ptr.size)])
+    line_end = np.concatenate([[0], ptr[1:] + 2 * np.arange(1, ptr.size)])
+
+    plotter = _setup_plotter(tess.bounds, off_screen=filename is not None)
+    fills, outlines = pv.PolyData(verts), pv.PolyData(verts)
+    fills.verts = outlines.verts = np.zeros(0, dtype=np.int64)  # no vertex glyphs
+    if verts.shape[0] > 0:
+        plotter.add_mesh(fills, color='darkgrey', show_edges=False)
+        plotter.add_mesh(outlines, color='k', line_width=1)
+
+    def draw_frame(k):
+        # Every frame shows a prefix of the precomputed cell arrays
+        j = shown[k]
+        fills.faces = faces[:face_end[j]]
+        outlines.lines = lines[:line_end[j]]
+
+    if filename is None:
+        plotter.add_timer_event(max_steps=shown.size, duration=int(1000 / fps),
+                                callback=lambda step: (draw_frame(min(step, shown.size - 1)), plotter.render()))
+        plotter.show()
+        return plotter
+
+    if str(filename).lower().endswith('.gif'):
+        plotter.open_gif(filename, fps=fps)
+    else:
+        plotter.open_movie(filename, framerate=fps)
+    for k in range(shown.size):
+        draw_frame(k)
+        plotter.write_frame()
+    plotter.close()
+    return plotter
@@ -0,0 +1,92 @@
+# tessellations/splittree.py
+"""Split hierarchy of a recursive splitting process as a flat BSP tree.
+
+After ``enable_split_tree()``, STIT and Mondrian record every cut while
+they sample and keep the tree as ``tess.split_tree``; otherwise it is
+None. Node ``i`` of the tree is the ``i``-th cut, node 0 being the cut
+of the whole window. It splits its cell by the hyperplane
+``normals[i] . x = offsets[i]`` (or ``x[axes[i]] = offsets[i]`` for
+axis-aligned cuts) into ``below[i]`` (points with
+``normals[i] . x <= offsets[i]``) and ``above[i]``. A non-negative child
+is another node; a negative child ``c`` is the leaf ``tess.cells[~c]``.
+
+    tess = STITTessellation(2, rng=0).enable_split_tree().sample(20)
+    labels = tess.split_tree.locate(np.random.default_rng(1).uniform(size=(10**6, 2)))
+"""
+import numpy as np
+
+
+class SplitTree:
+    """Array-backed binary space partition with batched point location."""
+
+    def __init__(self, offsets, below, above, lo, hi, normals=None, axes=None):
+        if (normals is None) == (axes is None):
+            raise ValueError("Give exactly one of normals or axes.")
+        self.offsets = np.asarray(offsets, dtype=float)
+        self.below = np.asarray(below, dtype=np.int64)
+        self.above = np.asarray(above, dtype=np.int64)
+        self.lo = np.asarray(lo, dtype=float)
+        self.hi = np.asarray(hi, dtype=float)
+        self.normals = None if normals is None else np.asarray(normals, dtype=float).reshape(-1, self.lo.size)
+        self.axes = None if axes is None else np.asarray(axes, dtype=np.int8)
+
+    @classmethod
+    def from_splits(cls, n_ids, parent, below, above, offsets, leaves, lo, hi, normals=None, axes=None):
+        """Build the tree from cuts recorded with the sampler's own cell ids.
+
+        ``n_ids`` is the number of cell ids handed out, cut ``i`` split cell
+        ``parent[i]`` into cells ``below[i]`` and ``above[i]``, and
+        ``leaves`` lists the ids of the final cells in ``tess.cells`` order.
+        """
+        code = np.zeros(n_ids, dtype=np.int64)
+        code[np.asarray(parent, dtype=np.int64)] = np.arange(len(parent))
+        code[np.asarray(leaves, dtype=np.int64)] = ~np.arange(len(leaves))
+        below = code[np.asarray(below, dtype=np.int64)]
+        above = code[np.asarray(above, dtype=np.int64)]
+        return cls(offsets, below, above, lo, hi, normals=normals, axes=axes)
+
+    @property
+    def n_cuts(self):
+        return self.offsets.size
+
+    @property
+    def depth(self):
+        """Number of cuts on the longest root-to-leaf path."""
+        depth, level = 0, np.zeros(min(self.n_cuts, 1), dtype=np.int64)
+        while level.size:
+            children = np.concatenate([self.below[level], self.above[level]])
+            level = np.unique(children[children >= 0])
+            depth += 1
+        return depth
+
+    def locate(self, points, chunk=1 << 16):
+        """Index into ``tess.cells`` of the cell containing each point (-1 outside the window).
+
+        The points of each chunk descend the tree together, one NumPy step
+        per level, dropping out as they reach a leaf. Points on a cut go to
+        the ``below`` side.
+        """
+        dim = self.lo.size
+        points = np.asarray(points, dtype=float).reshape(-1, dim)
+        result = np.zeros(points.shape[0], dtype=np.int64)
+        if self.normals is not None:
+            normals = [np.ascontiguousarray(self.normals[:, j]) for j in range(dim)]
+        for start in range(0, points.shape[0] if self.n_cuts else 0, chunk):
+            # One contiguous row per coordinate keeps the gathers cheap
+            cols = np.ascontiguousarray(points[start:start + chunk].T)
+            at = np.zeros(cols.shape[1], dtype=np.int64)
+            active = np.arange(cols.shape[1])
+            while active.size:
+                nd = at[active]
+                if self.axes is not None:
+                    proj = cols[self.axes[nd], active]
+                else:
+                    proj = cols[0, active] * normals[0][nd]
+                    for j in range(1, dim):
+                        proj += cols[j, active] * normals[j][nd]
+                nxt = np.where(proj > self.offsets[nd], self.above[nd], self.below[nd])
+                at[active] = nxt
+                active = active[nxt >= 0]
+            result[start:start + chunk] = ~at
+        result[~np.all((points >= self.lo) & (points <= self.hi), axis=1)] = -1
+        return result
@@ -0,0 +1,297 @@
+# tessellations/stats.py
+"""Bulk cell statistics and mergeable summaries.
+
+``cell_statistics`` computes per-cell quantities for a whole sampled
+tessellation at once, as NumPy columns. ``StatisticsReducer`` turns those
+columns into running moments and histograms that can be merged across
+realizations, e.g. the per-replicate results of ``run_ensemble``::
+
+    from tessellations.ensemble import run_ensemble
+    from tessellations.stats import StatisticsReducer, merge
+
+    parts = run_ensemble("stit", 2, 10, n=5000, workers=32,
+                         summary=StatisticsReducer.from_tessellation)
+    print(merge(parts).summary())
+"""
+import numpy as np
+import shapely
+from .polytope import _fan_triangles, pack_polytopes
+
+SCALAR_COLUMNS = ("measure", "surface", "n_vertices", "n_faces")
+
+# Integer-valued counts get unit bins by default
+DEFAULT_BINS = {
+    "n_vertices": np.arange(-0.5, 65.0),
+    "n_faces": np.arange(-0.5, 65.0),
+}
+
+
+def cell_measures(tess):
+    """Area (2D) or volume (3D) of every cell of a sampled tessellation."""
+    if hasattr(tess, "cell_bounds"):
+        b = tess.cell_bounds
+        if tess.dim == 2:
+            return (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+        return np.prod(b[:, 1::2] - b[:, 0::2], axis=1)
+    if tess.dim == 2 and getattr(tess, "packed", None) is None:
+        return shapely.area(np.asarray(tess.cells, dtype=object))
+    return cell_statistics(tess)["measure"]
+
+
+def cell_statistics(tess):
+    """Per-cell statistics of a sampled tessellation, computed in bulk.
+
+    Returns a dict of NumPy arrays with one row per cell:
+
+    - ``measure``: area (2D) or volume (3D)
+    - ``surface``: perimeter (2D) or surface area (3D)
+    - ``n_vertices``: number of vertices of the cell
+    - ``n_faces``: number of edges (2D) or facets (3D)
+    - ``centroid``: (N, dim) centroids
+    """
+    if hasattr(tess, "cell_bounds"):
+        return _box_statistics(tess.cell_bounds, tess.dim)
+    # Tessellations loaded from disk expose their flat buffers directly
+    packed = getattr(tess, "packed", None)
+    if packed is not None:
+        if tess.dim == 2:
+            return _ring_statistics(packed["vertices"], packed["cell_ptr"])
+        return _packed_polytope_statistics(packed)
+    if tess.dim == 2:
+        return _polygon_statistics(tess.cells)
+    return _packed_polytope_statistics(pack_polytopes(tess.cells))
+
+
+def _box_statistics(bounds, dim):
+    if dim == 2:
+        lo, hi = bounds[:, :2], bounds[:, 2:]
+    else:
+        lo, hi = bounds[:, 0::2], bounds[:, 1::2]
+    ext = hi - lo
+    n = bounds.shape[0]
+    if dim == 2:
+        surface = 2.0 * ext.sum(axis=1)
+    else:
+        surface = 2.0 * (ext[:, 0] * ext[:, 1] + ext[:, 1] * ext[:, 2] + ext[:, 0] * ext[:, 2])
+    return {
+        "measure": np.prod(ext, axis=1),
+        "surface": surface,
+        "n_vertices": np.full(n, 2 ** dim),
+        "n_faces": np.full(n, 2 * dim),
+        "centroid": 0.5 * (lo + hi),
+    }
+
+
+def _polygon_statistics(cells):
+    polys = np.asarray(cells, dtype=object)
+    # Closed rings repeat their first coordinate
+    n_vertices = shapely.get_num_coordinates(shapely.get_exterior_ring(polys)) - 1
+    return {
+        "measure": shapely.area(polys),
+        "surface": shapely.length(polys),
+        "n_vertices": n_vertices,
+        "n_faces": n_vertices.copy(),
+        "centroid": shapely.get_coordinates(shapely.centroid(polys)).reshape(-1, 2),
+    }
+
+
+def _ring_statistics(vertices, cell_ptr):
+    """Statistics of convex polygons stored as a vertex buffer plus offsets."""
+    vertices = np.asarray(vertices, dtype=float)
+    counts = np.diff(cell_ptr)
+    n_cells = counts.size
+    if n_cells == 0:
+        empty = np.zeros(0)
+        return {"measure": empty, "surface": empty, "n_vertices": counts,
+                "n_faces": counts.copy(), "centroid": np.zeros((0, 2))}
+    cell_of = np.repeat(np.arange(n_cells), counts)
+    nxt = np.arange(vertices.shape[0]) + 1
+    nxt[cell_ptr[1:] - 1] = cell_ptr[:-1]
+
+    # Shoelace terms relative to each cell's first vertex for accuracy
+    origin = vertices[cell_ptr[:-1]][cell_of]
+    p, q = vertices - origin, vertices[nxt] - origin
+    cross = p[:, 0] * q[:, 1] - p[:, 1] * q[:, 0]
+    area = 0.5 * np.bincount(cell_of, weights=cross, minlength=n_cells)
+    perimeter = np.bincount(cell_of, weights=np.linalg.norm(q - p, axis=1), minlength=n_cells)
+    moment = np.column_stack([
+        np.bincount(cell_of, weights=(p[:, k] + q[:, k]) * cross, minlength=n_cells) for k in range(2)
+    ])
+    centroid = vertices[cell_ptr[:-1]] + moment / (6.0 * np.where(area != 0, area, 1.0))[:, None]
+    return {
+        "measure": np.abs(area),
+        "surface": perimeter,
+        "n_vertices": counts,
+        "n_faces": counts.copy(),
+        "centroid": centroid,
+    }
+
+
+def _packed_polytope_statistics(packed):
+    verts = packed["vertices"]
+    vertex_ptr, cell_face_ptr = packed["vertex_ptr"], packed["cell_face_ptr"]
+    n_cells = vertex_ptr.size - 1
+    n_vertices = np.diff(vertex_ptr)
+    if n_cells == 0:
+        empty = np.zeros(0)
+        return {"measure": empty, "surface": empty, "n_vertices": n_vertices,
+                "n_faces": np.diff(cell_face_ptr), "centroid": np.zeros((0, 3))}
+
+    tris, face_of = _fan_triangles(packed["face_ptr"], packed["face_vertices"])
+    cell_of_face = np.repeat(np.arange(n_cells), np.diff(cell_face_ptr))
+    cell_of = cell_of_face[face_of]
+
+    # Tetrahedra from each cell's vertex mean to its boundary triangles
+    ref = np.add.reduceat(verts, vertex_ptr[:-1], axis=0) / n_vertices[:, None]
+    a, b, c = (verts[tris[:, k]] - ref[cell_of] for k in range(3))
+    tet = np.einsum("ij,ij->i", a, np.cross(b, c)) / 6.0
+    volume = np.bincount(cell_of, weights=tet, minlength=n_cells)
+
+    tri_area = 0.5 * np.linalg.norm(np.cross(b - a, c - a), axis=1)
+    surface = np.bincount(cell_of, weights=tri_area, minlength=n_cells)
+
+    moment = tet[:, None] * (a + b + c) / 4.0
+    centroid = ref + np.column_stack([
+        np.bincount(cell_of, weights=moment[:, k], minlength=n_cells) for k in range(3)
+    ]) / np.where(volume > 0, volume, 1.0)[:, None]
+
+    return {
+        "measure": volume,
+        "surface": surface,
+        "n_vertices": n_vertices,
+        "n_faces": np.diff(cell_face_ptr),
+        "centroid": centroid,
+    }
+
+
+class Moments:
+    """Mergeable count, mean, variance, min and max of a stream of values.
+
+    Batches are combined with the pairwise update of Chan et al., so merging
+    partial results gives the same moments as a single pass.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).reshape(-1)
+        if values.size == 0:
+            return self
+        batch = Moments()
+        batch.count = values.size
+        batch.mean = float(values.mean())
+        batch.m2 = float(((values - batch.mean) ** 2).sum())
+        batch.min = float(values.min())
+        batch.max = float(values.max())
+        return self.merge(batch)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.mean += delta * other.count / total
+        self.count = total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def variance(self):
+        """Unbiased sample variance (NaN for fewer than two values)."""
+        return self.m2 / (self.count - 1) if self.count > 1 else float("nan")
+
+    def as_dict(self):
+        return {"count": self.count, "mean": self.mean, "var": self.variance, "min": self.min, "max": self.max}
+
+
+class Histogram:
+    """Fixed-bin histogram that merges by adding counts."""
+
+    def __init__(self, edges):
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = np.zeros(self.edges.size - 1, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+
+    def update(self, values):
+        values = np.asarray(values, dtype=float).reshape(-1)
+        self.counts += np.histogram(values, bins=self.edges)[0]
+        self.underflow += int((values < self.edges[0]).sum())
+        self.overflow += int((values > self.edges[-1]).sum())
+        return self
+
+    def merge(self, other):
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("Cannot merge histograms with different bin edges.")
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        return self
+
+
+class StatisticsReducer:
+    """Mergeable summary of cell statistics over one or more realizations.
+
+    Keeps ``Moments`` for every scalar column of ``cell_statistics``, for the
+    number of cells per realization, and a ``Histogram`` for every column
+    listed in ``bins`` (a mapping from column name to bin edges; defaults to
+    ``DEFAULT_BINS``). Reducers built with the same bins can be merged.
+    """
+
+    def __init__(self, bins=None):
+        self.n_realizations = 0
+        self.cells_per_realization = Moments()
+        self.moments = {name: Moments() for name in SCALAR_COLUMNS}
+        bins = DEFAULT_BINS if bins is None else bins
+        self.histograms = {name: Histogram(edges) for name, edges in bins.items()}
+
+    @classmethod
+    def from_tessellation(cls, tess, bins=None):
+        """Reducer holding the statistics of a single realization."""
+        return cls(bins).update(tess)
+
+    def update(self, tess):
+        stats = cell_statistics(tess)
+        self.n_realizations += 1
+        self.cells_per_realization.update([stats["measure"].size])
+        for name, moments in self.moments.items():
+            moments.update(stats[name])
+        for name, hist in self.histograms.items():
+            hist.update(stats[name])
+        return self
+
+    def merge(self, other):
+        self.n_realizations += other.n_realizations
+        self.cells_per_realization.merge(other.cells_per_realization)
+        for name, moments in self.moments.items():
+            moments.merge(other.moments[name])
+        for name, hist in self.histograms.items():
+            hist.merge(other.histograms[name])
+        return self
+
+    def summary(self):
+        """Plain-dict view of the aggregated moments and histograms."""
+        return {
+            "n_realizations": self.n_realizations,
+            "cells_per_realization": self.cells_per_realization.as_dict(),
+            "moments": {name: m.as_dict() for name, m in self.moments.items()},
+            "histograms": {name: (h.edges, h.counts) for name, h in self.histograms.items()},
+        }
+
+
+def merge(reducers):
+    """Merge an iterable of ``StatisticsReducer`` objects, in order, into a new one."""
+    reducers = list(reducers)
+    if not reducers:
+        raise ValueError("Nothing to merge.")
+    total = StatisticsReducer(bins={name: h.edges for name, h in reducers[0].histograms.items()})
+    for reducer in reducers:
+        total.merge(reducer)
+    return total
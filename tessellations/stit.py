@@ -1,74 +1,345 @@
 # tessellations/stit.py
-from collections import deque
+import heapq
 import numpy as np
-from shapely.geometry import box, LineString
-from shapely.ops import split
-import pyvista as pv
+import shapely
+from shapely.geometry import box
+from .adjacency import Adjacency, clip_facet, facet_measure
 from .base import Tessellation
+from .polytope import ConvexPolytope, polygon_vertices, split_polygons
+from .splittree import SplitTree
+
+# Counters reported when profiling is enabled
+_COUNTERS = ("splits_attempted", "splits_missed", "degenerate_cells", "exceptions",
+             "queue_high_water", "cells_emitted")
 
 class STITTessellation(Tessellation):
-    """Generates a Stable Iterative Tessellation based on a recursive splitting process."""
+    """Generates a Stable Iterative Tessellation based on a recursive splitting process.
+
+    Every cell C lives for an exponential time with rate Lambda([C]), the
+    measure of the hyperplanes hitting C: its mean width when directions are
+    isotropic, or sum_k p_k * width_k(C) for a directional matrix. When it
+    dies, it is split by a hyperplane drawn from Lambda restricted to [C]:
+    the normal is chosen with probability proportional to p(n) * width_n(C)
+    and the offset uniformly across the cell, so every cut hits the cell.
+
+    Pending deaths are kept in a priority queue, which makes the simulation
+    resumable: ``extend`` continues a sampled tessellation to a later time.
+    Cells live and die independently of each other, so every death due
+    before the stop time is handled in one batch: the cuts are drawn with
+    array operations over all dying cells and, in 2D, the cells are split
+    together by ``polytope.split_polygons``. Children that die before the
+    stop time form the next batch.
+
+    With ``enable_split_tree()`` every cut is recorded in ``split_tree``
+    (see ``tessellations.splittree``), so ``tess.split_tree.locate(points)``
+    finds the cells containing a batch of points. With ``enable_adjacency()``
+    the facets shared by cells are also followed through every split to give
+    the ``adjacency`` graph.
+    """
+
     def sample(self, stop_time):
         """
         Generates the tessellation using a time-based recursive splitting process.
         """
+        for _ in self._run(stop_time):
+            pass
+        return self
+
+    def extend(self, stop_time):
+        """Continue the tessellation from ``self.time`` up to ``stop_time``.
+
+        STIT is Markov in time, so the result has the same law as calling
+        ``sample(stop_time)`` directly.
+        """
+        if getattr(self, "_queue", None) is None:
+            raise RuntimeError("Run the .sample() method before extending.")
+        if stop_time < self.time:
+            raise ValueError(f"Cannot extend backwards in time (current time {self.time}, requested {stop_time}).")
+        for _ in self._advance(stop_time):
+            pass
+        return self
+
+    def _run(self, stop_time, retain=True):
         if self.dim == 2:
             minx, miny, maxx, maxy = self.bounds
             initial_cell = box(minx, miny, maxx, maxy)
         else:
-            initial_cell = pv.Box(bounds=self.bounds)
-        
-        active_cells = deque([(initial_cell, 0.0)])
+            initial_cell = ConvexPolytope.from_bounds(self.bounds)
+
+        if self.profile is not None:
+            self.profile.reset()
+            self.profile.counters.update(dict.fromkeys(_COUNTERS, 0))
         self.cells = []
         self.hyperplanes = []
+        self.time = 0.0
+        self._queue = []
+        self._live = {}
+        self._n_nodes = 0
+        # Without retention only cells that still have to split are kept
+        self._horizon = np.inf if retain else stop_time
+        self._retain = retain
+        self._splits = [] if self.track_split_tree and retain else None
+        self._neighbours = {0: {}} if self.track_adjacency and retain else None
+        self._tol = 1e-9 * max(float(np.max(np.abs(self.bounds))), 1.0)
+        _, deaths = self._add_cells([initial_cell], 0.0)
+        if deaths[0] > stop_time:
+            if self.profile is not None and not retain:
+                self.profile.count("cells_emitted")
+            yield ([], [], []), ([initial_cell], [0.0], deaths)
+        yield from self._advance(stop_time)
 
-        while active_cells:
-            cell, birth_time = active_cells.popleft()
+    def _advance(self, stop_time):
+        """Process all deaths up to ``stop_time``, yielding each batch's cuts and final cells."""
+        prof = self.profile
+        retain = self._retain
+        with self._phase("total"):
+            while self._queue and self._queue[0][0] <= stop_time:
+                batch = []
+                while self._queue and self._queue[0][0] <= stop_time:
+                    batch.append(heapq.heappop(self._queue))
+                cells = [self._live.pop(cell_id)[0] for _, cell_id in batch]
 
-            if self.dim == 2:
-                metric = cell.area
-            else:
-                metric = cell.volume
+                with self._phase("hyperplane_sampling"):
+                    points, normals = self._sample_hyperplanes(cells)
+
+                with self._phase("clipping"):
+                    parts = self._split_cells(cells, points, normals)
+                # Only hyperplanes that actually split their cell are cuts
+                made = np.array([len(split_cells) == 2 for split_cells in parts], dtype=bool)
+                if retain:
+                    self.hyperplanes.extend(zip(points[made], normals[made]))
+                final, births, deaths = [], [], []
+                with self._phase("scheduling"):
+                    offsets = np.einsum("ij,ij->i", points, normals)
+                    for (death_time, cell_id), split_cells, n, offset in zip(batch, parts, normals, offsets):
+                        child_ids, child_deaths = self._add_cells(split_cells, death_time)
+                        for cell, death in zip(split_cells, child_deaths):
+                            if death > stop_time:
+                                final.append(cell)
+                                births.append(death_time)
+                                deaths.append(death)
+                        if retain:
+                            below, above = self._record_split(cell_id, child_ids, n, float(offset))
+                            if self._neighbours is not None:
+                                self._update_adjacency(cell_id, split_cells, child_ids, below, above, n, float(offset))
+                if prof is not None and not retain:
+                    prof.count("cells_emitted", len(final))
+                times = [death for (death, _), m in zip(batch, made) if m]
+                yield (times, points[made], normals[made]), (final, births, deaths)
+
+            self.time = float(stop_time)
+            if not retain:
+                # Nothing is left to extend
+                self._queue = None
+                self.birth_times = np.zeros(0)
+                self.split_tree = None
+                self.adjacency = None
+                return
+            self.cells = [cell for cell, _ in self._live.values()]
+            self.birth_times = np.array([birth for _, birth in self._live.values()], dtype=float)
+            self.split_tree = None if self._splits is None else self._build_split_tree()
+            self.adjacency = None if self._neighbours is None else self._build_adjacency()
+        if prof is not None:
+            prof.counters["cells_emitted"] = len(self.cells)
+
+    def _add_cells(self, cells, birth_time):
+        """Register cells born at ``birth_time`` and schedule their deaths.
 
-            if metric <= 1e-9:
-                self.cells.append(cell)
+        Returns their ids and death times (inf for cells that can never be
+        hit). Cells dying after ``self._horizon`` are not kept.
+        """
+        ids, deaths = [], np.full(len(cells), np.inf)
+        for i, (cell, rate) in enumerate(zip(cells, self._hitting_rates(cells))):
+            cell_id = self._n_nodes
+            self._n_nodes += 1
+            ids.append(cell_id)
+            if rate > 1e-12:
+                deaths[i] = birth_time + self.rng.exponential(1.0 / rate)
+            elif self.profile is not None:
+                # A cell with no extent can never be hit again
+                self.profile.count("degenerate_cells")
+            if deaths[i] > self._horizon:
                 continue
+            self._live[cell_id] = (cell, birth_time)
+            if rate > 1e-12:
+                heapq.heappush(self._queue, (deaths[i], cell_id))
+                if self.profile is not None:
+                    self.profile.maximum("queue_high_water", len(self._queue))
+        return ids, deaths
 
-            lifetime = np.random.exponential(1.0 / metric)
+    # --- Split tree ---
+    def _record_split(self, parent, child_ids, n, offset):
+        """Remember which child lies below and which above the cut of ``parent``."""
+        # Split parts always come as (below, above)
+        below, above = child_ids[0], child_ids[-1]
+        if self._splits is not None:
+            self._splits.append((parent, below, above, n, offset))
+        return below, above
 
-            if birth_time + lifetime > stop_time:
-                self.cells.append(cell)
-            else:
-                current_time = birth_time + lifetime
+    def _build_split_tree(self):
+        if self.dim == 2:
+            lo, hi = np.array(self.bounds[:2]), np.array(self.bounds[2:])
+        else:
+            lo, hi = np.array(self.bounds[::2]), np.array(self.bounds[1::2])
+        parent, below, above, normals, offsets = (zip(*self._splits) if self._splits else ([],) * 5)
+        return SplitTree.from_splits(self._n_nodes, list(parent), list(below), list(above), list(offsets),
+                                     list(self._live), lo, hi, normals=np.array(normals, dtype=float))
 
-                cell_bounds = cell.bounds
-                if self.dim == 2:
-                    low = (cell_bounds[0], cell_bounds[1])
-                    high = (cell_bounds[2], cell_bounds[3])
-                    p = np.random.uniform(low, high, size=2)
-                else: # 3D
-                    p = np.random.uniform(cell_bounds[::2], cell_bounds[1::2], size=3)
+    # --- Adjacency ---
+    def _update_adjacency(self, parent, parts, child_ids, below, above, n, offset):
+        """Hand the parent's facets to the children on either side of the cut."""
+        facets = self._neighbours.pop(parent)
+        if len(child_ids) == 1:
+            # Missed split: the same cell carries on under a new id
+            child = child_ids[0]
+            self._neighbours[child] = facets
+            for q in facets:
+                self._neighbours[q][child] = self._neighbours[q].pop(parent)
+            return
+        for child in child_ids:
+            self._neighbours[child] = {}
+        for q, facet in facets.items():
+            del self._neighbours[q][parent]
+            lower, upper = clip_facet(facet, n, offset, self._tol)
+            if lower is not None:
+                self._neighbours[below][q] = self._neighbours[q][below] = lower
+            if upper is not None:
+                self._neighbours[above][q] = self._neighbours[q][above] = upper
+        cut = self._cut_facet(parts, n, offset)
+        self._neighbours[below][above] = self._neighbours[above][below] = cut
 
-                n = self._sample_direction()
-                self.hyperplanes.append((p, n))
+    def _cut_facet(self, parts, n, offset):
+        """The facet the cut creates between the two parts, in cyclic order."""
+        if self.dim == 2:
+            verts = self._vertices(parts[0])
+            on = verts[np.abs(verts @ n - offset) <= self._tol]
+            t = on @ np.array([-n[1], n[0]])
+            return on[[np.argmin(t), np.argmax(t)]]
+        # The cap of the lower part is its face with outward normal n
+        below = parts[0]
+        f = int(np.argmax(below.normals @ n))
+        return below.vertices[below.face_vertices[below.face_ptr[f]:below.face_ptr[f + 1]]]
 
-                split_cells = []
-                self._clip_and_add(cell, p, n, split_cells)
+    def _build_adjacency(self):
+        index = {cell_id: i for i, cell_id in enumerate(self._live)}
+        a, b, measure = [], [], []
+        for cell_id, facets in self._neighbours.items():
+            for q, facet in facets.items():
+                if cell_id < q:
+                    a.append(index[cell_id])
+                    b.append(index[q])
+                    measure.append(facet_measure(facet))
+        return Adjacency.from_pairs(len(index), a, b, measure)
 
-                for new_cell in split_cells:
-                    active_cells.append((new_cell, current_time))
-        
-        return self
+    # --- Hitting measure ---
+    def _vertices(self, cell):
+        if self.dim == 2:
+            return np.asarray(cell.exterior.coords)[:-1]
+        return cell.vertices
+
+    def _ragged_vertices(self, cells):
+        """Vertices of all cells as one array and a ``vertex_ptr`` into it."""
+        if self.dim == 2:
+            return polygon_vertices(cells)
+        counts = [cell.vertices.shape[0] for cell in cells]
+        return np.concatenate([cell.vertices for cell in cells]), np.concatenate([[0], np.cumsum(counts)])
+
+    def _hitting_rates(self, cells):
+        """Lambda([C]) of every cell: its mean width under the directional distribution."""
+        if not cells:
+            return np.zeros(0)
+        if self.direction_unit_vectors is not None:
+            verts, ptr = self._ragged_vertices(cells)
+            return _widths(verts @ self.direction_unit_vectors.T, ptr) @ self.direction_probabilities
+        if self.dim == 2:
+            # Cauchy's formula for convex polygons
+            return shapely.length(np.asarray(cells, dtype=object)) / np.pi
+        return np.array([cell.mean_width() for cell in cells])
+
+    def _sample_hyperplanes(self, cells):
+        """Draw one hyperplane per cell from the hitting measure restricted to it.
+
+        Returns (k, dim) arrays of points on the hyperplanes and their normals.
+        """
+        verts, ptr = self._ragged_vertices(cells)
+        counts = np.diff(ptr)
+        k = counts.size
+        owner = np.repeat(np.arange(k), counts)
+        with self._phase("direction_sampling"):
+            if self.direction_unit_vectors is not None:
+                weights = _widths(verts @ self.direction_unit_vectors.T, ptr) * self.direction_probabilities
+                cum = np.cumsum(weights, axis=1)
+                u = self.rng.uniform(size=k) * cum[:, -1]
+                idx = np.minimum((cum <= u[:, None]).sum(axis=1), cum.shape[1] - 1)
+                normals = self.direction_unit_vectors[idx]
+            else:
+                # Isotropic directions weighted by width, by rejection against
+                # the bounding-box diagonal (an upper bound on every width)
+                bound = np.linalg.norm(np.maximum.reduceat(verts, ptr[:-1]) - np.minimum.reduceat(verts, ptr[:-1]), axis=1)
+                normals = np.empty((k, self.dim))
+                pending = np.arange(k)
+                while pending.size:
+                    m = pending.size
+                    candidates = self.sample_directions(8 * m).reshape(m, 8, self.dim)
+                    rows = np.isin(owner, pending)
+                    local = np.repeat(np.arange(m), counts[pending])
+                    proj = np.einsum("vd,vcd->vc", verts[rows], candidates[local])
+                    widths = _widths(proj, np.concatenate([[0], np.cumsum(counts[pending])]))
+                    accepted = self.rng.uniform(size=(m, 8)) * bound[pending, None] <= widths
+                    done = accepted.any(axis=1)
+                    normals[pending[done]] = candidates[done, accepted[done].argmax(axis=1)]
+                    pending = pending[~done]
+
+        proj = np.einsum("vd,vd->v", verts, normals[owner])
+        offsets = self.rng.uniform(np.minimum.reduceat(proj, ptr[:-1]), np.maximum.reduceat(proj, ptr[:-1]))
+        centres = np.add.reduceat(verts, ptr[:-1], axis=0) / counts[:, None]
+        points = centres + (offsets - np.einsum("ij,ij->i", centres, normals))[:, None] * normals
+        return points, normals
 
-    def _clip_and_add(self, cell, p, n, new_cells):
+    def _split_cells(self, cells, points, normals):
+        """Split every cell by its hyperplane; each entry is ``[below, above]``, or ``[cell]`` if it was missed."""
+        prof = self.profile
+        if prof is not None:
+            prof.count("splits_attempted", len(cells))
+        if self.dim == 2:
+            try:
+                below, above = split_polygons(cells, points, normals)
+                parts = [None if b is None else (b, a) for b, a in zip(below, above)]
+            except Exception:
+                # Fall back to one cell at a time to isolate the failure
+                parts = [self._split_one(cell, p, n) for cell, p, n in zip(cells, points, normals)]
+        else:
+            parts = [self._split_one(cell, p, n) for cell, p, n in zip(cells, points, normals)]
+
+        result = []
+        for cell, part in zip(cells, parts):
+            if part is _FAILED:
+                # Keep the unsplit cell rather than abort the whole run
+                if prof is not None:
+                    prof.count("exceptions")
+                result.append([cell])
+            elif part is None:
+                if prof is not None:
+                    prof.count("splits_missed")
+                result.append([cell])
+            else:
+                result.append(list(part))
+        return result
+
+    def _split_one(self, cell, p, n):
         try:
             if self.dim == 2:
-                line = LineString([p - 1000 * n, p + 1000 * n])
-                new_cells.extend(list(split(cell, line).geoms))
-            else:
-                c1 = cell.clip(normal=n, origin=p, invert=False)
-                c2 = cell.clip(normal=n, origin=p, invert=True)
-                if c1.n_points > 0 and c1.n_cells > 0: new_cells.append(c1)
-                if c2.n_points > 0 and c2.n_cells > 0: new_cells.append(c2)
+                below, above = split_polygons([cell], [p], [n])
+                return None if below[0] is None else (below[0], above[0])
+            return cell.split(p, n)
         except Exception:
-            new_cells.append(cell)
\ No newline at end of file
+            return _FAILED
+
+
+# Marks a cell whose split raised, as opposed to a missed split (None)
+_FAILED = object()
+
+
+def _widths(proj, ptr):
+    """Per-cell extent (max - min) of projected vertices given by ``vertex_ptr``."""
+    return np.maximum.reduceat(proj, ptr[:-1]) - np.minimum.reduceat(proj, ptr[:-1])
@@ -0,0 +1,269 @@
+# tessellations/storage.py
+"""Compact columnar on-disk format for sampled tessellations.
+
+A tessellation is flattened into contiguous arrays:
+
+- ``hyperplane_points``, ``hyperplane_normals``: (H, dim)
+- Mondrian: ``cell_bounds`` (N, 2*dim) and ``birth_times`` (N,)
+- 2D polygons: ``vertices`` (V, 2) and ``cell_ptr`` (N + 1,) offsets
+- 3D polytopes: the buffers of ``polytope.pack_polytopes`` (vertex buffer,
+  vertex/face offsets, face index and facet half-spaces)
+- ``birth_times`` for STIT cells, and the directional distribution if any
+- the ``split_tree`` if one was kept: ``split_offsets``, ``split_below``,
+  ``split_above`` and either ``split_normals`` or ``split_axes``
+
+plus JSON metadata (type, dim, bounds, parameter, seed). ``save`` writes
+either one uncompressed ``.npz`` file or a directory of raw ``.npy`` files;
+``load`` memory-maps both, so reloading takes milliseconds and no Python
+geometry objects are built until ``cells`` is accessed.
+"""
+import json
+import os
+import zipfile
+import numpy as np
+import shapely
+from .base import Tessellation
+from .ensemble import TESSELLATIONS
+from .polytope import ConvexPolytope, pack_polytopes, unpack_polytopes
+from .splittree import SplitTree
+
+FORMAT_VERSION = 1
+_META_NAME = "meta.json"
+_NPZ_META_KEY = "__meta__"
+
+
+def _seed_to_json(seed):
+    if seed is None or isinstance(seed, (int, np.integer)):
+        return None if seed is None else int(seed)
+    if isinstance(seed, np.random.SeedSequence):
+        return {"entropy": str(seed.entropy), "spawn_key": [int(k) for k in seed.spawn_key]}
+    return repr(seed)
+
+
+def _seed_from_json(seed):
+    if isinstance(seed, dict):
+        return np.random.SeedSequence(int(seed["entropy"]), spawn_key=tuple(seed["spawn_key"]))
+    return seed
+
+
+def _parameter(tess):
+    """Name and value of the parameter the tessellation was sampled with."""
+    if hasattr(tess, "lam"):
+        return "lam", float(tess.lam)
+    if hasattr(tess, "stop_time"):
+        return "stop_time", float(tess.stop_time)
+    if hasattr(tess, "time"):
+        return "stop_time", float(tess.time)
+    return None, None
+
+
+def to_arrays(tess):
+    """Flatten a sampled tessellation into ``(arrays, metadata)``."""
+    if isinstance(tess, LoadedTessellation):
+        return dict(tess.arrays), dict(tess.meta)
+
+    kinds = {cls: name for name, cls in TESSELLATIONS.items()}
+    param_name, param_value = _parameter(tess)
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "type": kinds.get(type(tess), type(tess).__name__),
+        "dim": tess.dim,
+        "bounds": [float(b) for b in tess.bounds],
+        "parameter": param_name,
+        "value": param_value,
+        "seed": _seed_to_json(getattr(tess, "seed", None)),
+    }
+
+    arrays = {}
+    if hasattr(tess, "hyperplane_points"):
+        arrays["hyperplane_points"] = tess.hyperplane_points
+        arrays["hyperplane_normals"] = tess.hyperplane_normals
+    else:
+        arrays["hyperplane_points"] = np.array([p for p, _ in tess.hyperplanes], dtype=float).reshape(-1, tess.dim)
+        arrays["hyperplane_normals"] = np.array([n for _, n in tess.hyperplanes], dtype=float).reshape(-1, tess.dim)
+
+    if hasattr(tess, "cell_bounds"):
+        meta["cells"] = "boxes"
+        arrays["cell_bounds"] = tess.cell_bounds
+    elif tess.dim == 2:
+        meta["cells"] = "polygons"
+        rings = shapely.get_exterior_ring(np.asarray(tess.cells, dtype=object))
+        coords = shapely.get_coordinates(rings)
+        counts = shapely.get_num_coordinates(rings)
+        # Drop the closing coordinate of every ring
+        last = np.cumsum(counts) - 1
+        keep = np.ones(coords.shape[0], dtype=bool)
+        keep[last] = False
+        arrays["vertices"] = coords[keep]
+        arrays["cell_ptr"] = np.concatenate([[0], np.cumsum(counts - 1)])
+    else:
+        meta["cells"] = "polytopes"
+        arrays.update(pack_polytopes(tess.cells))
+
+    if getattr(tess, "birth_times", None) is not None:
+        arrays["birth_times"] = np.asarray(tess.birth_times, dtype=float)
+    if getattr(tess, "direction_probabilities", None) is not None:
+        arrays["direction_unit_vectors"] = tess.direction_unit_vectors
+        arrays["direction_probabilities"] = tess.direction_probabilities
+    tree = getattr(tess, "split_tree", None)
+    if tree is not None:
+        arrays["split_offsets"] = tree.offsets
+        arrays["split_below"] = tree.below
+        arrays["split_above"] = tree.above
+        if tree.normals is not None:
+            arrays["split_normals"] = tree.normals
+        else:
+            arrays["split_axes"] = tree.axes
+    return arrays, meta
+
+
+def save(tess, path):
+    """Save a sampled tessellation.
+
+    ``path`` ending in ``.npz`` writes a single uncompressed archive;
+    anything else is treated as a directory of ``.npy`` files plus
+    ``meta.json``.
+    """
+    arrays, meta = to_arrays(tess)
+    arrays = {name: np.ascontiguousarray(a) for name, a in arrays.items()}
+    if str(path).endswith(".npz"):
+        np.savez(path, **arrays, **{_NPZ_META_KEY: np.array(json.dumps(meta))})
+        return path
+    os.makedirs(path, exist_ok=True)
+    for name, array in arrays.items():
+        np.save(os.path.join(path, name + ".npy"), array)
+    with open(os.path.join(path, _META_NAME), "w") as f:
+        json.dump(meta, f, indent=2)
+    return path
+
+
+def _memmap_npz(path, mmap_mode="r"):
+    """Memory-map every member of an uncompressed ``.npz`` archive."""
+    arrays = {}
+    with zipfile.ZipFile(path) as zf, open(path, "rb") as raw:
+        for info in zf.infolist():
+            name = info.filename[:-4] if info.filename.endswith(".npy") else info.filename
+            if info.compress_type != zipfile.ZIP_STORED:
+                arrays[name] = np.load(zf.open(info))
+                continue
+            # Skip the local file header to reach the stored .npy bytes
+            raw.seek(info.header_offset + 26)
+            name_len, extra_len = np.frombuffer(raw.read(4), dtype="<u2")
+            start = info.header_offset + 30 + int(name_len) + int(extra_len)
+            raw.seek(start)
+            read_header = {
+                (1, 0): np.lib.format.read_array_header_1_0,
+                (2, 0): np.lib.format.read_array_header_2_0,
+            }.get(np.lib.format.read_magic(raw))
+            if read_header is None:
+                arrays[name] = np.load(zf.open(info))
+                continue
+            shape, fortran, dtype = read_header(raw)
+            if dtype.hasobject or shape == () or int(np.prod(shape)) == 0:
+                arrays[name] = np.load(zf.open(info))
+                continue
+            arrays[name] = np.memmap(path, dtype=dtype, mode=mmap_mode, offset=raw.tell(), shape=shape,
+                                     order="F" if fortran else "C")
+    return arrays
+
+
+def load(path, mmap_mode="r"):
+    """Load a tessellation written by ``save``.
+
+    Arrays are memory-mapped (pass ``mmap_mode=None`` to read them into
+    memory). Returns a ``LoadedTessellation``.
+    """
+    if str(path).endswith(".npz"):
+        if mmap_mode is None:
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in data.files}
+        else:
+            arrays = _memmap_npz(path, mmap_mode)
+        meta = json.loads(str(np.asarray(arrays.pop(_NPZ_META_KEY))))
+    else:
+        with open(os.path.join(path, _META_NAME)) as f:
+            meta = json.load(f)
+        arrays = {
+            entry[:-4]: np.load(os.path.join(path, entry), mmap_mode=mmap_mode)
+            for entry in os.listdir(path) if entry.endswith(".npy")
+        }
+    return LoadedTessellation(arrays, meta)
+
+
+class LoadedTessellation(Tessellation):
+    """A tessellation backed by the flat arrays of a saved file.
+
+    ``cells`` and ``hyperplanes`` are rebuilt lazily on first access;
+    ``tessellations.stats`` works directly on the arrays.
+    """
+
+    def __init__(self, arrays, meta):
+        self.arrays = arrays
+        self.meta = meta
+        super().__init__(meta["dim"], rng=_seed_from_json(meta.get("seed")))
+        self.bounds = list(meta["bounds"])
+        self.kind = meta["type"]
+        if meta.get("parameter") is not None:
+            setattr(self, meta["parameter"], meta["value"])
+        self.birth_times = arrays.get("birth_times")
+        if "cell_bounds" in arrays:
+            self.cell_bounds = arrays["cell_bounds"]
+        if "direction_probabilities" in arrays:
+            self._set_direction_matrix(
+                np.asarray(arrays["direction_unit_vectors"]) * np.asarray(arrays["direction_probabilities"])[:, None]
+            )
+        if "split_offsets" in arrays:
+            if self.dim == 2:
+                lo, hi = self.bounds[:2], self.bounds[2:]
+            else:
+                lo, hi = self.bounds[::2], self.bounds[1::2]
+            self.split_tree = SplitTree(arrays["split_offsets"], arrays["split_below"], arrays["split_above"],
+                                        lo, hi, normals=arrays.get("split_normals"), axes=arrays.get("split_axes"))
+
+    @property
+    def packed(self):
+        """Flat cell buffers (None for box cells)."""
+        if self.meta["cells"] == "boxes":
+            return None
+        return self.arrays
+
+    @property
+    def n_cells(self):
+        if self.meta["cells"] == "boxes":
+            return self.arrays["cell_bounds"].shape[0]
+        ptr = self.arrays["cell_ptr"] if self.meta["cells"] == "polygons" else self.arrays["vertex_ptr"]
+        return ptr.shape[0] - 1
+
+    @property
+    def cells(self):
+        if self._cells is None:
+            self._cells = self._build_cells()
+        return self._cells
+
+    @cells.setter
+    def cells(self, value):
+        self._cells = None if not value else list(value)
+
+    @property
+    def hyperplanes(self):
+        return list(zip(self.arrays["hyperplane_points"], self.arrays["hyperplane_normals"]))
+
+    @hyperplanes.setter
+    def hyperplanes(self, value):
+        pass  # Hyperplanes come from the stored arrays
+
+    def _build_cells(self):
+        a = self.arrays
+        layout = self.meta["cells"]
+        if layout == "boxes":
+            if self.dim == 2:
+                return list(shapely.box(*np.asarray(a["cell_bounds"]).T))
+            return [ConvexPolytope.from_bounds(b) for b in np.asarray(a["cell_bounds"])]
+        if layout == "polygons":
+            ptr = np.asarray(a["cell_ptr"])
+            rings = shapely.linearrings(np.asarray(a["vertices"]), indices=np.repeat(np.arange(ptr.size - 1), np.diff(ptr)))
+            return list(shapely.polygons(rings))
+        return unpack_polytopes(a)
+
+    def sample(self, *args, **kwargs):
+        raise NotImplementedError("Loaded tessellations are read-only; sample a new one instead.")
@@ -0,0 +1,35 @@
+# tests/test_cache.py
+import os
+import numpy as np
+from tessellations.cache import SampleCache
+from tessellations.ensemble import TESSELLATIONS
+from tessellations.stit import STITTessellation
+
+
+def test_seeded_sample_is_reused(tmp_path):
+    cache = SampleCache(tmp_path)
+    first = cache.sample(STITTessellation(2, rng=0), 10)
+    second = cache.sample(STITTessellation(2, rng=0), 10)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert second.n_cells == len(first.cells)
+
+
+def test_unseeded_sample_leaves_cache_empty(tmp_path):
+    cache = SampleCache(tmp_path)
+    for _ in range(2):
+        tess = cache.sample(STITTessellation(2), 10)
+        assert len(tess.cells) > 0
+    assert os.listdir(tmp_path) == []
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+def test_cache_hit_keeps_split_tree(tmp_path):
+    points = np.random.default_rng(1).uniform(size=(1000, 2))
+    cache = SampleCache(tmp_path)
+    for kind in ("stit", "mondrian"):
+        first = cache.sample(TESSELLATIONS[kind](2, rng=0).enable_split_tree(), 20)
+        second = cache.sample(TESSELLATIONS[kind](2, rng=0).enable_split_tree(), 20)
+        assert second is not first
+        assert second.split_tree is not None
+        np.testing.assert_array_equal(second.split_tree.locate(points), first.split_tree.locate(points))
+    assert cache.hits == 2